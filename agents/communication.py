@@ -14,6 +14,8 @@ Key Features:
 - Communication logging and history tracking
 
 Classes:
+    MessageRecord: Compact history entry for a message between agents
+    LogRecord: Compact communication log entry
     AgentCommunicationProtocol: Core communication protocol implementation
     HTTPAgentServer: HTTP interface for agent communication (simplified demo version)
 
@@ -21,11 +23,144 @@ The system supports different message types including content generation,
 question setting, answer evaluation, and health checks.
 """
 
+import asyncio
+import copy
+import hashlib
 import json
-import requests
+import queue
+import sys
+import threading
 import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from itertools import count, islice
+from typing import Callable, Dict, Any, List, Literal, Optional, Tuple, Union, overload
+
+# Optional: MessagePack gives smaller, faster wire envelopes than JSON
+try:
+    import msgpack  # type: ignore
+except ImportError:
+    msgpack = None
+
+# Optional: only needed for forwarding requests to remote agent servers
+try:
+    import requests  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
+    from urllib3.util.retry import Retry  # type: ignore
+except ImportError:
+    requests = None
+
+CONTENT_TYPE_JSON = 'application/json'
+CONTENT_TYPE_MSGPACK = 'application/msgpack'
+
+# Interned message types: incoming types are interned on submit, so routing
+# compares and the history records share these exact string objects
+MT_GENERATE_CONTENT = sys.intern('generate_content')
+MT_GENERATE_QUESTIONS = sys.intern('generate_questions')
+MT_EVALUATE_ANSWERS = sys.intern('evaluate_answers')
+MT_HEALTH_CHECK = sys.intern('health_check')
+
+# Last (epoch second, ISO date/time prefix) pair rendered by _iso
+_iso_cache: Tuple[Optional[int], str] = (None, '')
+
+
+def _iso(ts_ns: int) -> str:
+    """
+    Render an epoch timestamp in nanoseconds as an ISO-8601 string.
+
+    Timestamps are stored as time.time_ns() integers and only formatted when they leave the
+    protocol. The date/time part is cached per second, so calls within the same second only
+    append the milliseconds.
+    """
+    global _iso_cache
+    seconds, nanos = divmod(ts_ns, 1_000_000_000)
+    cached_seconds, prefix = _iso_cache
+    if seconds != cached_seconds:
+        prefix = datetime.fromtimestamp(seconds).isoformat(timespec='seconds')
+        _iso_cache = (seconds, prefix)
+    return f"{prefix}.{nanos // 1_000_000:03d}"
+
+
+def encode_envelope(data: Dict[str, Any], content_type: str = CONTENT_TYPE_MSGPACK) -> bytes:
+    """
+    Serialize a message envelope or response for the wire.
+
+    MessagePack is used when requested and installed; otherwise the envelope
+    is encoded as JSON. Values neither format supports are sent as strings.
+    """
+    if content_type == CONTENT_TYPE_MSGPACK and msgpack is not None:
+        return msgpack.packb(data, use_bin_type=True, default=str)
+    return json.dumps(data, default=str).encode('utf-8')
+
+
+def decode_envelope(payload: Union[bytes, str], content_type: str = CONTENT_TYPE_MSGPACK) -> Dict[str, Any]:
+    """Deserialize a wire envelope produced by encode_envelope."""
+    if content_type == CONTENT_TYPE_MSGPACK and msgpack is not None:
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+class MessageRecord:
+
+    """
+    History entry for a message sent between agents.
+
+    Uses __slots__ instead of a per-instance dict, which keeps the history
+    buffer small and makes field access cheap. Records are converted to
+    plain dicts only when handed out via to_dict().
+    """
+
+    __slots__ = ('id', 'sender', 'receiver', 'type', 'content_keys', 'ts_ns', 'status',
+                 'response_status', 'error')
+
+    def __init__(self, id: int, sender: str, receiver: str, type: str, content_keys: List[str],
+                 ts_ns: int, status: str, response_status: Optional[str] = None,
+                 error: Optional[str] = None):
+        self.id = id
+        self.sender = sender
+        self.receiver = receiver
+        self.type = type
+        self.content_keys = content_keys
+        self.ts_ns = ts_ns
+        self.status = status
+        self.response_status = response_status
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the record with an ISO-formatted timestamp."""
+        return {
+            'id': self.id,
+            'sender': self.sender,
+            'receiver': self.receiver,
+            'type': self.type,
+            'content_keys': self.content_keys,
+            'timestamp': _iso(self.ts_ns),
+            'status': self.status,
+            'response_status': self.response_status,
+            'error': self.error
+        }
+
+
+@dataclass(slots=True)
+class LogRecord:
+
+    """Communication log entry stored with __slots__ for a compact log buffer."""
+
+    ts_ns: int
+    agent_id: str
+    action: str
+    details: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the entry with an ISO-formatted timestamp."""
+        return {
+            'timestamp': _iso(self.ts_ns),
+            'agent_id': self.agent_id,
+            'action': self.action,
+            'details': self.details
+        }
 
 class AgentCommunicationProtocol:
     
@@ -38,17 +173,90 @@ class AgentCommunicationProtocol:
 
     Attributes:
         agents (dict): Registered agents with their capabilities and status
-        message_history (list): History of all messages sent between agents
-        communication_logs (list): Logs of communication events and system actions
+        message_history (deque): Bounded history of messages sent between agents
+        communication_logs (deque): Bounded logs of communication events and system actions
     """
 
-    def __init__(self):
-        """Initialize the communication protocol with empty agent registry."""
-        self.agents = {}
-        self.message_history = []
-        self.communication_logs = []
+    # Worker threads draining each agent's inbox
+    WORKERS_PER_AGENT = 4
+
+    # Number of recent full message payloads kept for inspection
+    PAYLOAD_CACHE_SIZE = 100
+
+    # Number of distinct content-generation requests whose results are reused
+    CONTENT_CACHE_SIZE = 512
+
+    # Circuit breaker: after this many consecutive failures an agent is
+    # fast-failed for a backoff that doubles with each further failure. Once
+    # the backoff has elapsed a single probe message is let through; its
+    # success closes the circuit, its failure reopens it.
+    BREAKER_THRESHOLD = 5
+    BREAKER_BASE_BACKOFF = 1.0
+    BREAKER_MAX_BACKOFF = 60.0
+
+    # Handler errors caused by the request itself (bad arguments or content);
+    # they are reported to the sender but do not count against the agent
+    CALLER_ERRORS = (TypeError, ValueError)
 
-    def register_agent(self, agent_id: str, agent_instance, capabilities: List[str]):
+    # Message types routed to an agent method of the same name
+    _HANDLERS = {
+        MT_GENERATE_CONTENT: 'generate_content',
+        MT_GENERATE_QUESTIONS: 'generate_questions',
+        MT_EVALUATE_ANSWERS: 'evaluate_answers'
+    }
+
+    def __init__(self, retention_hours: Optional[float] = None, retain_responses: bool = False):
+        """
+        Initialize the communication protocol with empty agent registry.
+
+        Args:
+            retention_hours (Optional[float]): If set, history and log entries
+                older than this are dropped as new entries are appended
+            retain_responses (bool): Keep agent responses in the payload cache
+                alongside message content; off by default since responses are
+                already returned to the sender and are usually the bulk of it
+        """
+        self.agents: Dict[str, Dict[str, Any]] = {}
+        # Ring buffers: appends are O(1) and the oldest entries are evicted
+        # automatically once the cap is reached.
+        self.message_history: deque = deque(maxlen=10000)
+        self.communication_logs: deque = deque(maxlen=1000)
+        self.retention_hours = retention_hours
+        self.retain_responses = retain_responses
+
+        # Messages are processed on per-agent worker threads; the lock guards
+        # the shared history/log buffers they update.
+        self._lock = threading.Lock()
+
+        # Monotonic counters for message and collaboration IDs; next() on
+        # itertools.count is atomic under the GIL, so no lock is needed
+        self._id_counter = count(1)
+        self._session_counter = count(1)
+
+        # Per-agent views of message_history holding references to the same
+        # records, so filtered history lookups don't scan every message
+        self._by_agent: Dict[str, deque] = defaultdict(deque)
+
+        # (agent_id, message_type) -> bound handler, filled by register_agent
+        self._dispatch: Dict[Tuple[str, str], Callable[..., Any]] = {}
+
+        # History keeps only message metadata; full content/response payloads
+        # of the most recent messages live here, keyed by message ID (LRU)
+        self._payload_cache: OrderedDict = OrderedDict()
+
+        # Successful content_generator responses keyed by a digest of their
+        # request parameters, reused by the collaboration workflows (LRU)
+        self._content_cache: OrderedDict = OrderedDict()
+
+        # agent_id -> [consecutive_failures, open_until_ns, probe_message_id]
+        # for failing agents; probe_message_id is 0 while no probe is in flight
+        self._breaker: Dict[str, List[int]] = {}
+
+        # Set by close(); no further messages are accepted afterwards
+        self._closed = False
+
+    def register_agent(self, agent_id: str, agent_instance, capabilities: List[str],
+                       handlers: Optional[Dict[str, Callable[..., Any]]] = None):
         """
         Register an agent with the communication system.
 
@@ -56,21 +264,71 @@ class AgentCommunicationProtocol:
             agent_id (str): Unique identifier for the agent
             agent_instance: The actual agent object/instance
             capabilities (List[str]): List of capabilities this agent provides
+            handlers (Optional[Dict[str, Callable]]): Extra message type to
+                callable mappings, added to (or overriding) the standard handlers
+
+        Each agent gets an inbox queue drained by WORKERS_PER_AGENT daemon
+        threads, so senders are decoupled from the receiver's processing.
         """
+        previous = self.agents.get(agent_id)
+        if previous is not None:
+            # Stop the workers serving the agent being replaced
+            for _ in previous['workers']:
+                previous['inbox'].put(None)
+            for message_type in previous['handlers']:
+                self._dispatch.pop((agent_id, message_type), None)
+            if agent_id == 'content_generator':
+                with self._lock:
+                    self._content_cache.clear()
+            with self._lock:
+                self._breaker.pop(agent_id, None)
+
+        # Resolve handler methods once instead of per message
+        bound = {
+            message_type: getattr(agent_instance, method_name)
+            for message_type, method_name in self._HANDLERS.items()
+            if hasattr(agent_instance, method_name)
+        }
+        if handlers:
+            bound.update((sys.intern(message_type), handler) for message_type, handler in handlers.items())
+        for message_type, handler in bound.items():
+            self._dispatch[(agent_id, message_type)] = handler
+
+        inbox: queue.SimpleQueue = queue.SimpleQueue()
+        workers = [
+            threading.Thread(target=self._agent_worker, args=(inbox,), name=f"agent-{agent_id}-{i}", daemon=True)
+            for i in range(self.WORKERS_PER_AGENT)
+        ]
+
         self.agents[agent_id] = {
             'instance': agent_instance,
             'capabilities': capabilities,
             'status': 'active',
-            'last_seen': datetime.now().isoformat()
+            'last_seen': time.time_ns(),
+            'handlers': list(bound),
+            'inbox': inbox,
+            'workers': workers
         }
 
+        for worker in workers:
+            worker.start()
+
         self._log_communication(
             'system',
             'agent_registration',
             f"Agent {agent_id} registered with capabilities: {', '.join(capabilities)}"
         )
 
-    def send_message(self, sender_id: str, receiver_id: str, message_type: str, content: Dict[str, Any]):
+    @overload
+    def send_message(self, sender_id: str, receiver_id: str, message_type: str, content: Dict[str, Any],
+                     mode: Literal['sync'] = 'sync', _suppress_log: bool = False) -> Dict[str, Any]: ...
+
+    @overload
+    def send_message(self, sender_id: str, receiver_id: str, message_type: str, content: Dict[str, Any],
+                     mode: Literal['async'], _suppress_log: bool = False) -> Future: ...
+
+    def send_message(self, sender_id: str, receiver_id: str, message_type: str, content: Dict[str, Any],
+                     mode: str = 'sync', _suppress_log: bool = False) -> Union[Dict[str, Any], Future]:
         """
         Send a message between agents.
 
@@ -79,85 +337,292 @@ class AgentCommunicationProtocol:
             receiver_id (str): ID of the receiving agent
             message_type (str): Type of message (e.g., 'generate_content', 'evaluate_answers')
             content (Dict[str, Any]): Message payload/data
+            mode (str): 'sync' waits for the response; 'async' returns a Future
+                as soon as the message is queued on the receiver's inbox
+            _suppress_log (bool): Skip the per-message log entry (callers log in batch)
+
+        Returns:
+            Union[Dict[str, Any], Future]: Response from the receiving agent,
+            or a Future resolving to it when mode is 'async'
+
+        Raises:
+            ValueError: If receiver agent is not registered or mode is unknown
+            RuntimeError: If the receiver is fast-failed by its circuit breaker
+        """
+        if mode not in ('sync', 'async'):
+            raise ValueError(f"Unknown send mode: {mode}")
+
+        future = self.submit_message(sender_id, receiver_id, message_type, content, _suppress_log)
+        if mode == 'async':
+            return future
+        return future.result()
+
+    async def send_message_async(self, sender_id: str, receiver_id: str, message_type: str,
+                                 content: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Awaitable variant of send_message for callers inside an event loop.
+
+        The message is processed on the receiver's worker threads as usual;
+        awaiting it leaves the event loop free to run other tasks meanwhile.
+        """
+        return await asyncio.wrap_future(self.submit_message(sender_id, receiver_id, message_type, content))
+
+    def submit_message(self, sender_id: str, receiver_id: str, message_type: str, content: Dict[str, Any],
+                       _suppress_log: bool = False) -> Future:
+        """
+        Queue a message on the receiver's inbox without waiting for it to be processed.
+
+        Args:
+            sender_id (str): ID of the sending agent
+            receiver_id (str): ID of the receiving agent
+            message_type (str): Type of message (e.g., 'generate_content', 'evaluate_answers')
+            content (Dict[str, Any]): Message payload/data
+            _suppress_log (bool): Skip the per-message log entry (callers log in batch)
 
         Returns:
-            Dict[str, Any]: Response from the receiving agent
+            Future: Resolves to the receiver's response, or raises its error
+            (RuntimeError right away while the receiver's circuit is open)
 
         Raises:
             ValueError: If receiver agent is not registered
+            RuntimeError: If the protocol has been closed
         """
+        if self._closed:
+            raise RuntimeError("Communication protocol is closed")
         if receiver_id not in self.agents:
             raise ValueError(f"Agent {receiver_id} not found")
 
-        message = {
-            'id': f"msg_{int(time.time())}_{len(self.message_history)}",
-            'sender': sender_id,
-            'receiver': receiver_id,
-            'type': message_type,
-            'content': content,
-            'timestamp': datetime.now().isoformat(),
-            'status': 'sent'
-        }
+        message_type = sys.intern(message_type)
+
+        message_id = next(self._id_counter)
+
+        future: Future = Future()
+
+        # Fast-fail while the receiver's circuit is open instead of queueing
+        # work behind an agent that keeps failing
+        state = self._admit(receiver_id, message_id)
+        if state is not None:
+            error = RuntimeError(f"Agent {receiver_id} is unavailable after {state[0]} consecutive failures")
+            if not _suppress_log:
+                self._log_communication(sender_id, 'error', f"Failed to send message to {receiver_id}: {error}")
+            future.set_exception(error)
+            return future
+        self.agents[receiver_id]['inbox'].put(
+            (future, message_id, sender_id, receiver_id, message_type, content, _suppress_log)
+        )
+        return future
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Stop every agent's inbox workers.
+
+        Messages already queued are still delivered; new messages are
+        rejected. Waits up to `timeout` seconds per worker for it to exit.
+        """
+        self._closed = True
+        agents = list(self.agents.values())
+        for agent in agents:
+            for _ in agent['workers']:
+                agent['inbox'].put(None)
+        for agent in agents:
+            for worker in agent['workers']:
+                worker.join(timeout)
+
+    def _agent_worker(self, inbox: queue.SimpleQueue) -> None:
+        """Deliver messages from an agent's inbox until a stop sentinel arrives."""
+        while True:
+            item = inbox.get()
+            if item is None:
+                return
+            future = item[0]
+            try:
+                self._deliver(*item)
+            except Exception as e:
+                # A failure in the bookkeeping around the handler must neither
+                # kill this worker nor leave the sender waiting on the future
+                if not future.done():
+                    future.set_exception(e)
+                self._release_probe(item[3], item[1])
+
+    def _deliver(self, future: Future, message_id: int, sender_id: str, receiver_id: str, message_type: str,
+                 content: Dict[str, Any], suppress_log: bool) -> None:
+        """Process a queued message, record it in history and resolve its future."""
+        if not future.set_running_or_notify_cancel():
+            return
 
         try:
             # Process the message through the receiver agent
-            response = self._process_message(message)
-            message['status'] = 'delivered'
-            message['response'] = response
+            response = self._process_message(receiver_id, message_type, content)
 
-            self.message_history.append(message)
+        except Exception as e:
+            # The envelope is only built once the outcome is known
+            self._cache_payload(message_id, content, None)
+            self._record_message(message_id, sender_id, receiver_id, message_type, content, 'failed', error=str(e))
+            if isinstance(e, self.CALLER_ERRORS):
+                self._release_probe(receiver_id, message_id)
+            else:
+                self._record_failure(receiver_id)
+            if not suppress_log:
+                self._log_communication(sender_id, 'error', f"Failed to send message to {receiver_id}: {str(e)}")
+            future.set_exception(e)
+            return
+
+        self._cache_payload(message_id, content, response)
+        self._record_message(
+            message_id, sender_id, receiver_id, message_type, content, 'delivered',
+            response_status=response.get('status')
+        )
+        if receiver_id in self._breaker:
+            with self._lock:
+                self._breaker.pop(receiver_id, None)
+        if not suppress_log:
             self._log_communication(sender_id, message_type, f"Message sent to {receiver_id}")
 
-            return response
+        future.set_result(response)
 
-        except Exception as e:
-            message['status'] = 'failed'
-            message['error'] = str(e)
-            self.message_history.append(message)
-            self._log_communication(sender_id, 'error', f"Failed to send message to {receiver_id}: {str(e)}")
-            raise
+    def _circuit_open(self, agent_id: str) -> Optional[List[int]]:
+        """
+        Return the agent's breaker state while its circuit is open, else None.
 
-    def _process_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        The circuit counts as open during the backoff and while a half-open
+        probe is in flight.
         """
-        Process a message and route it to the appropriate agent method.
+        state = self._breaker.get(agent_id)
+        if state is not None and state[0] >= self.BREAKER_THRESHOLD and (state[2] or time.time_ns() < state[1]):
+            return state
+        return None
 
-        Args:
-            message (Dict[str, Any]): The message to process
+    def _admit(self, agent_id: str, message_id: int) -> Optional[List[int]]:
+        """
+        Decide whether a message may be queued for an agent.
 
-        Returns:
-            Dict[str, Any]: Processing result with status and data
+        Returns None to admit it, or the breaker state if it must be
+        fast-failed. Once the backoff has elapsed the first message is
+        admitted as the half-open probe; others fail fast until it completes.
+        """
+        with self._lock:
+            state = self._circuit_open(agent_id)
+            if state is not None:
+                return state
+            state = self._breaker.get(agent_id)
+            if state is not None and state[0] >= self.BREAKER_THRESHOLD:
+                state[2] = message_id
+            return None
+
+    def _release_probe(self, agent_id: str, message_id: int) -> None:
+        """Let another probe through when this probe failed for a reason not counted against the agent."""
+        with self._lock:
+            state = self._breaker.get(agent_id)
+            if state is not None and state[2] == message_id:
+                state[2] = 0
+
+    def _record_failure(self, agent_id: str) -> None:
+        """Count a failed delivery and (re)open the agent's circuit past the threshold."""
+        with self._lock:
+            state = self._breaker.setdefault(agent_id, [0, 0, 0])
+            state[0] += 1
+            excess = state[0] - self.BREAKER_THRESHOLD
+            if excess >= 0:
+                backoff = min(self.BREAKER_BASE_BACKOFF * (2 ** excess), self.BREAKER_MAX_BACKOFF)
+                state[1] = time.time_ns() + int(backoff * 10**9)
+                state[2] = 0
+
+    def _cache_payload(self, message_id: int, content: Dict[str, Any], response: Optional[Dict[str, Any]]) -> None:
         """
-        receiver_id = message['receiver']
-        message_type = message['type']
-        content = message['content']
+        Keep a message's full content, and its response if retain_responses
+        is set, in the payload cache.
 
-        receiver_agent = self.agents[receiver_id]['instance']
+        History entries keep only the content keys, so large generated text
+        does not stay resident for the lifetime of the history buffer.
+        """
+        if not self.retain_responses:
+            response = None
+        with self._lock:
+            cache = self._payload_cache
+            cache[message_id] = {'content': content, 'response': response}
+            if len(cache) > self.PAYLOAD_CACHE_SIZE:
+                cache.popitem(last=False)
+
+    def _record_message(self, message_id: int, sender_id: str, receiver_id: str, message_type: str,
+                        content: Dict[str, Any], status: str, response_status: Optional[str] = None,
+                        error: Optional[str] = None) -> None:
+        """
+        Append a message to history and the agent index, evicting the oldest entry when full.
 
-        # Route message based on type and agent capabilities
-        if message_type == 'generate_content':
-            if hasattr(receiver_agent, 'generate_content'):
-                result = receiver_agent.generate_content(**content)
-                return {'status': 'success', 'data': result}
+        Workers finish messages out of submission order, so the record is
+        stamped under the lock as it is appended. That keeps history in time
+        order, which retention and expiry rely on. The receiver's last_seen
+        is refreshed with the same stamp.
+        """
+        with self._lock:
+            message = MessageRecord(
+                id=message_id,
+                sender=sender_id,
+                receiver=receiver_id,
+                type=message_type,
+                content_keys=list(content) if isinstance(content, dict) else [],
+                ts_ns=time.time_ns(),
+                status=status,
+                response_status=response_status,
+                error=error
+            )
+            if self.retention_hours is not None:
+                self._expire_locked(message.ts_ns - int(self.retention_hours * 3600 * 10**9))
 
-        elif message_type == 'generate_questions':
-            if hasattr(receiver_agent, 'generate_questions'):
-                result = receiver_agent.generate_questions(**content)
-                return {'status': 'success', 'data': result}
+            history = self.message_history
+            if len(history) == history.maxlen:
+                self._evict_msg(history.popleft())
+            history.append(message)
 
-        elif message_type == 'evaluate_answers':
-            if hasattr(receiver_agent, 'evaluate_answers'):
-                result = receiver_agent.evaluate_answers(**content)
-                return {'status': 'success', 'data': result}
+            # The receiver just handled a message, successfully or not
+            agent = self.agents.get(receiver_id)
+            if agent is not None:
+                agent['last_seen'] = message.ts_ns
 
-        elif message_type == 'health_check':
-            return {'status': 'success', 'agent_id': receiver_id, 'timestamp': datetime.now().isoformat()}
+            self._by_agent[message.sender].append(message)
+            if message.receiver != message.sender:
+                self._by_agent[message.receiver].append(message)
 
-        else:
+    def _evict_msg(self, message: MessageRecord) -> None:
+        """
+        Drop a message leaving history from the agent index.
+
+        The index is appended in the same order as history, so an evicted
+        message is always at the head of its agents' index deques.
+        """
+        for agent_id in (message.sender, message.receiver):
+            index = self._by_agent.get(agent_id)
+            if index and index[0] is message:
+                index.popleft()
+                if not index:
+                    del self._by_agent[agent_id]
+
+    def _process_message(self, receiver_id: str, message_type: str, content: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process a message and route it to the appropriate agent method.
+
+        Args:
+            receiver_id (str): ID of the receiving agent
+            message_type (str): Type of message to route
+            content (Dict[str, Any]): Message payload passed to the handler
+
+        Returns:
+            Dict[str, Any]: Processing result with status and data
+        """
+        if message_type is MT_HEALTH_CHECK:
+            return {'status': 'success', 'agent_id': receiver_id, 'timestamp': _iso(time.time_ns())}
+
+        # Route message through the handlers bound at registration time
+        handler = self._dispatch.get((receiver_id, message_type))
+        if handler is not None:
+            return {'status': 'success', 'data': handler(**content)}
+
+        if message_type not in self._HANDLERS:
             return {'status': 'error', 'message': f"Unknown message type: {message_type}"}
 
         return {'status': 'error', 'message': 'Unknown processing error'}
 
-    def broadcast_message(self, sender_id: str, message_type: str, content: Dict[str, Any]) -> Dict[str, List]:
+    def broadcast_message(self, sender_id: str, message_type: str, content: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         """
         Broadcast a message to all registered agents.
 
@@ -167,20 +632,86 @@ class AgentCommunicationProtocol:
             content (Dict[str, Any]): Message payload
 
         Returns:
-            Dict[str, List]: Responses from all agents keyed by agent ID
+            Dict[str, Dict[str, Any]]: Responses from all agents keyed by agent ID
+
+        Recipients are messaged concurrently, so a broadcast takes roughly as
+        long as the slowest agent rather than the sum of all agents. The whole
+        broadcast is logged as one batch instead of one entry per recipient.
+        """
+        futures = self._submit_broadcast(sender_id, message_type, content)
+        return self._collect_broadcast(sender_id, message_type, futures)
+
+    async def broadcast_message_async(self, sender_id: str, message_type: str,
+                                      content: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Awaitable variant of broadcast_message for callers inside an event loop.
+
+        Waits on all recipients with asyncio.gather instead of blocking the
+        loop's thread; responses and logging match broadcast_message.
         """
-        responses = {}
+        futures = self._submit_broadcast(sender_id, message_type, content)
+        await asyncio.gather(*(asyncio.wrap_future(future) for future in futures.values()), return_exceptions=True)
+        return self._collect_broadcast(sender_id, message_type, futures)
+
+    def _submit_broadcast(self, sender_id: str, message_type: str, content: Dict[str, Any]) -> Dict[str, Future]:
+        """Queue a broadcast message on every agent's inbox except the sender's."""
+        return {
+            agent_id: self.submit_message(sender_id, agent_id, message_type, content, _suppress_log=True)
+            for agent_id in list(self.agents) if agent_id != sender_id  # Don't send to self
+        }
 
-        for agent_id in self.agents:
-            if agent_id != sender_id:  # Don't send to self
-                try:
-                    response = self.send_message(sender_id, agent_id, message_type, content)
-                    responses[agent_id] = response
-                except Exception as e:
-                    responses[agent_id] = {'status': 'error', 'message': str(e)}
+    def _collect_broadcast(self, sender_id: str, message_type: str,
+                           futures: Dict[str, Future]) -> Dict[str, Dict[str, Any]]:
+        """Gather broadcast responses keyed by agent ID and log the broadcast as one batch."""
+        # Collect outcomes without raising and re-catching each agent's error
+        errors = {agent_id: future.exception() for agent_id, future in futures.items()}
+        responses = {
+            agent_id: future.result() if errors[agent_id] is None
+            else {'status': 'error', 'message': str(errors[agent_id])}
+            for agent_id, future in futures.items()
+        }
+
+        log_entries = [
+            (sender_id, 'error', f"Failed to send message to {agent_id}: {str(error)}")
+            for agent_id, error in errors.items() if error is not None
+        ]
+        log_entries.append((sender_id, message_type, f"Broadcast to {len(futures)} agents"))
+        self._log_communication_batch(log_entries)
 
         return responses
 
+    def send_messages_batch(self, sender_id: str,
+                            messages: List[Tuple[str, str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Send several independent messages at once and wait for all responses.
+
+        Every message is queued before any response is awaited, so receivers
+        process them concurrently.
+
+        Args:
+            sender_id (str): ID of the sending agent
+            messages (List[tuple]): (receiver_id, message_type, content) triples
+
+        Returns:
+            List[Dict[str, Any]]: Responses in the order of `messages`; failed
+            messages yield {'status': 'error', 'message': ...}
+        """
+        outcomes: List[Union[Future, Exception]] = []
+        for receiver_id, message_type, content in messages:
+            try:
+                outcomes.append(self.submit_message(sender_id, receiver_id, message_type, content))
+            except ValueError as e:
+                outcomes.append(e)
+
+        responses = []
+        for outcome in outcomes:
+            error = outcome if isinstance(outcome, Exception) else outcome.exception()
+            if error is None and isinstance(outcome, Future):
+                responses.append(outcome.result())
+            else:
+                responses.append({'status': 'error', 'message': str(error)})
+        return responses
+
     def request_collaboration(self, initiator_id: str, task_type: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Request collaboration between multiple agents for a complex task.
@@ -204,15 +735,50 @@ class AgentCommunicationProtocol:
         else:
             raise ValueError(f"Unknown collaboration task type: {task_type}")
 
+    def _generate_content_cached(self, initiator_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a generate_content request, reusing an earlier successful response
+        for identical parameters.
+
+        Tutoring sessions repeat the same (topic, difficulty, subject) across
+        users, so hits skip the LLM round trip entirely. Failed responses are
+        not cached. The cache keeps its own copy and every hit gets a fresh
+        deep copy, so a caller editing its result cannot change what later
+        sessions receive.
+        """
+        key = hashlib.blake2b(
+            json.dumps(params, sort_keys=True, default=str).encode('utf-8'), digest_size=16
+        ).digest()
+
+        with self._lock:
+            cached = self._content_cache.get(key)
+            if cached is not None:
+                self._content_cache.move_to_end(key)
+        if cached is not None:
+            return {'status': 'success', 'data': copy.deepcopy(cached)}
+
+        response = self.send_message(initiator_id, 'content_generator', MT_GENERATE_CONTENT, params)
+        if response.get('status') == 'success':
+            stored = copy.deepcopy(response.get('data'))
+            with self._lock:
+                cache = self._content_cache
+                cache[key] = stored
+                if len(cache) > self.CONTENT_CACHE_SIZE:
+                    cache.popitem(last=False)
+        return response
+
     def _handle_tutoring_collaboration(self, initiator_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Handle a complete tutoring session collaboration workflow.
 
         This coordinates content generation followed by question generation
         to create a complete learning session.
+
+        Generated payloads are attached once, under 'content' and 'questions';
+        the entries in 'steps' only record each step's outcome.
         """
-        result = {
-            'session_id': f"session_{int(time.time())}",
+        result: Dict[str, Any] = {
+            'session_id': f"session_{next(self._session_counter)}",
             'status': 'in_progress',
             'steps': []
         }
@@ -220,20 +786,20 @@ class AgentCommunicationProtocol:
         try:
             # Step 1: Generate content using content generator agent
             if 'content_generator' in self.agents:
-                content_response = self.send_message(
+                content_response = self._generate_content_cached(
                     initiator_id,
-                    'content_generator',
-                    'generate_content',
                     {
                         'topic': task_data.get('topic'),
                         'difficulty': task_data.get('difficulty', 'Intermediate'),
                         'subject': task_data.get('subject', 'General')
                     }
                 )
+                content_data = content_response.get('data')
+                result['content'] = content_data
                 result['steps'].append({
                     'step': 'content_generation',
                     'status': 'completed',
-                    'data': content_response
+                    'response_status': content_response.get('status')
                 })
 
                 # Step 2: Generate questions based on generated content
@@ -243,15 +809,16 @@ class AgentCommunicationProtocol:
                         'question_setter',
                         'generate_questions',
                         {
-                            'content': content_response['data'],
+                            'content': content_data,
                             'question_count': task_data.get('question_count', 5),
                             'question_types': task_data.get('question_types', ['Multiple Choice', 'Short Answer'])
                         }
                     )
+                    result['questions'] = questions_response.get('data')
                     result['steps'].append({
                         'step': 'question_generation',
                         'status': 'completed',
-                        'data': questions_response
+                        'response_status': questions_response.get('status')
                     })
 
             result['status'] = 'completed'
@@ -268,20 +835,15 @@ class AgentCommunicationProtocol:
 
         Coordinates content creation followed by question generation for assessment.
         """
-        result = {
-            'collaboration_id': f"collab_{int(time.time())}",
+        result: Dict[str, Any] = {
+            'collaboration_id': f"collab_{next(self._session_counter)}",
             'status': 'in_progress',
             'phases': []
         }
 
         try:
             # Phase 1: Content Creation
-            content_result = self.send_message(
-                initiator_id,
-                'content_generator',
-                'generate_content',
-                task_data.get('content_params', {})
-            )
+            content_result = self._generate_content_cached(initiator_id, task_data.get('content_params', {}))
 
             result['phases'].append({
                 'phase': 'content_creation',
@@ -326,16 +888,44 @@ class AgentCommunicationProtocol:
         if agent_id not in self.agents:
             return {'status': 'not_found'}
 
-        agent_info = self.agents[agent_id].copy()
+        # Build the public view directly; the agent instance, bound handlers
+        # and inbox/worker internals are not part of the status payload.
+        # An agent fast-failed by its circuit breaker reports 'unavailable'.
+        agent = self.agents[agent_id]
+        return {
+            'capabilities': agent['capabilities'],
+            'status': 'unavailable' if self._circuit_open(agent_id) is not None else agent['status'],
+            'last_seen': _iso(agent['last_seen']),
+            'responsive': self._fast_health_check(agent_id)
+        }
 
-        # Check if agent is responsive by sending health check
-        try:
-            health_response = self.send_message('system', agent_id, 'health_check', {})
-            agent_info['responsive'] = health_response.get('status') == 'success'
-        except:
-            agent_info['responsive'] = False
+    def _fast_health_check(self, agent_id: str) -> bool:
+        """
+        Check agent responsiveness without going through the message pipeline.
+
+        Status polling previously sent a health_check message per call, which
+        queued behind real work and filled the history with no-op entries.
+        An agent counts as responsive when it is active, its circuit breaker
+        is closed, its inbox still has live workers, and its optional ping()
+        hook (if any) succeeds.
+        """
+        agent = self.agents.get(agent_id)
+        if agent is None or agent.get('status') != 'active':
+            return False
 
-        return agent_info
+        if self._circuit_open(agent_id) is not None:
+            return False
+
+        if not any(worker.is_alive() for worker in agent['workers']):
+            return False
+
+        ping = getattr(agent['instance'], 'ping', None)
+        if ping is None:
+            return True
+        try:
+            return bool(ping())
+        except Exception:
+            return False
 
     def get_communication_logs(self, limit: int = 50) -> List[Dict[str, Any]]:
 
@@ -349,7 +939,12 @@ class AgentCommunicationProtocol:
             List[Dict[str, Any]]: Recent communication log entries
         """
 
-        return self.communication_logs[-limit:]
+        # Walk back from the newest end so only `limit` entries are visited;
+        # workers log concurrently, so the entries are taken under the lock
+        with self._lock:
+            recent = list(islice(reversed(self.communication_logs), max(0, limit)))
+        recent.reverse()
+        return [log.to_dict() for log in recent]
 
     def get_message_history(self, agent_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
         
@@ -363,14 +958,36 @@ class AgentCommunicationProtocol:
         Returns:
             List[Dict[str, Any]]: Message history entries        
         """
-        history = self.message_history
+        # Walk back from the newest entry so the cost is O(limit), not O(history);
+        # workers append concurrently, so the records are taken under the lock
+        with self._lock:
+            if agent_id:
+                history = self._by_agent.get(agent_id, ())
+            else:
+                history = self.message_history
+            recent = list(islice(reversed(history), max(limit, 0)))
+        recent.reverse()
+
+        # Hand out dict snapshots rather than the stored records
+        return [msg.to_dict() for msg in recent]
+
+    def get_message_payload(self, message_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the full content and response of a recent message.
 
-        if agent_id:
-            history = [msg for msg in history if msg['sender'] == agent_id or msg['receiver'] == agent_id]
+        The response is None unless the protocol was created with
+        retain_responses=True.
 
-        return history[-limit:]
+        Args:
+            message_id (int): ID of the message as reported in the history
 
-    def _log_communication(self, agent_id: str, action: str, details: str):
+        Returns:
+            Optional[Dict[str, Any]]: Content and response payload, or None if
+            it is no longer cached
+        """
+        return self._payload_cache.get(message_id)
+
+    def _log_communication(self, agent_id: str, action: str, details: str) -> None:
         """
         Log communication events for monitoring and debugging.
 
@@ -379,18 +996,28 @@ class AgentCommunicationProtocol:
             action (str): Type of action performed
             details (str): Detailed description of the event
         """
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'agent_id': agent_id,
-            'action': action,
-            'details': details
-        }
-
-        self.communication_logs.append(log_entry)
+        with self._lock:
+            # Stamped under the lock so concurrent writers append in time order
+            log_entry = LogRecord(time.time_ns(), agent_id, action, details)
+            if self.retention_hours is not None:
+                self._expire_locked(log_entry.ts_ns - int(self.retention_hours * 3600 * 10**9))
+            self.communication_logs.append(log_entry)
+
+    def _log_communication_batch(self, entries: List[Tuple[str, str, str]]) -> None:
+        """
+        Log several communication events under a single timestamp.
 
-        # Keep only recent logs to prevent memory issues
-        if len(self.communication_logs) > 1000:
-            self.communication_logs = self.communication_logs[-500:]
+        Args:
+            entries (List[tuple]): (agent_id, action, details) tuples to log
+        """
+        with self._lock:
+            ts_ns = time.time_ns()
+            if self.retention_hours is not None:
+                self._expire_locked(ts_ns - int(self.retention_hours * 3600 * 10**9))
+            self.communication_logs.extend(
+                LogRecord(ts_ns, agent_id, action, details)
+                for agent_id, action, details in entries
+            )
 
     def clear_history(self, older_than_hours: int = 24):
         """
@@ -399,17 +1026,46 @@ class AgentCommunicationProtocol:
         Args:
             older_than_hours (int): Remove entries older than this many hours
         """
-        cutoff_time = datetime.now().timestamp() - (older_than_hours * 3600)
+        cutoff_ns = time.time_ns() - older_than_hours * 3600 * 10**9
 
-        self.message_history = [
-            msg for msg in self.message_history
-            if datetime.fromisoformat(msg['timestamp']).timestamp() > cutoff_time
-        ]
+        with self._lock:
+            self._expire_locked(cutoff_ns)
 
-        self.communication_logs = [
-            log for log in self.communication_logs
-            if datetime.fromisoformat(log['timestamp']).timestamp() > cutoff_time
-        ]
+    def _expire_locked(self, cutoff_ns: int) -> None:
+        """
+        Drop history and log entries stamped at or before cutoff_ns.
+
+        Must be called with the lock held. When nothing has expired this is
+        two head comparisons, which is what makes per-append retention cheap.
+        """
+        for message in self._drop_expired(self.message_history, cutoff_ns):
+            self._evict_msg(message)
+        self._drop_expired(self.communication_logs, cutoff_ns)
+
+    @staticmethod
+    def _drop_expired(buffer: deque, cutoff_ns: int) -> List[Any]:
+        """
+        Remove entries stamped at or before cutoff_ns from a time-ordered buffer.
+
+        Entries are appended in time order, so expired ones sit at the left end:
+        the scan stops at the first live entry, and a fully expired buffer is
+        emptied in one call.
+
+        Returns:
+            list: The removed records, oldest first
+        """
+        if not buffer or buffer[0].ts_ns > cutoff_ns:
+            return []
+
+        if buffer[-1].ts_ns <= cutoff_ns:
+            expired = list(buffer)
+            buffer.clear()
+            return expired
+
+        expired = []
+        while buffer[0].ts_ns <= cutoff_ns:
+            expired.append(buffer.popleft())
+        return expired
 
 class HTTPAgentServer:
 
@@ -424,6 +1080,10 @@ class HTTPAgentServer:
 
     """
 
+    # Connection pool sizing for requests forwarded to remote agent servers
+    POOL_CONNECTIONS = 32
+    POOL_MAXSIZE = 64
+
     def __init__(self, host: str = "0.0.0.0", port: int = 8000):
 
         """
@@ -437,12 +1097,73 @@ class HTTPAgentServer:
         self.host = host
         self.port = port
         self.communication_protocol = AgentCommunicationProtocol()
-        self.routes = {
+        routes = {
             '/send_message': self._handle_send_message,
+            '/send_batch': self._handle_send_batch,
             '/broadcast': self._handle_broadcast,
             '/agent_status': self._handle_agent_status,
             '/health': self._handle_health_check
         }
+        # Interned keys: endpoints that are literals or were interned by the
+        # caller match by identity; others fall back to a cached-hash compare
+        self.routes = {sys.intern(path): handler for path, handler in routes.items()}
+        # Pooled HTTP session for forward_request, created on first use
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        Shared requests.Session with pooled keep-alive connections.
+
+        Reusing connections avoids a TCP/TLS handshake per forwarded message.
+        """
+        if self._session is None:
+            if requests is None:
+                raise RuntimeError("requests is required to forward messages to remote agent servers")
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=self.POOL_CONNECTIONS,
+                        pool_maxsize=self.POOL_MAXSIZE,
+                        max_retries=Retry(total=3, backoff_factor=0.1)
+                    )
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def forward_request(self, base_url: str, endpoint: str, request_data: Dict[str, Any],
+                        content_type: str = CONTENT_TYPE_JSON, timeout: float = 30.0) -> Dict[str, Any]:
+        """
+        Send a request to a remote agent server over the pooled session.
+
+        Args:
+            base_url (str): Remote server address, e.g. 'http://host:8000'
+            endpoint (str): API endpoint path on the remote server
+            request_data (Dict[str, Any]): Request payload
+            content_type (str): Wire format (CONTENT_TYPE_JSON or CONTENT_TYPE_MSGPACK)
+            timeout (float): Request timeout in seconds
+
+        Returns:
+            Dict[str, Any]: Decoded response from the remote server
+        """
+        if content_type == CONTENT_TYPE_MSGPACK and msgpack is None:
+            content_type = CONTENT_TYPE_JSON  # encode_envelope falls back to JSON
+
+        try:
+            response = self.session.post(
+                base_url.rstrip('/') + endpoint,
+                data=encode_envelope(request_data, content_type),
+                headers={'Content-Type': content_type},
+                timeout=timeout
+            )
+            response.raise_for_status()
+            response_type = response.headers.get('Content-Type', content_type).split(';')[0].strip()
+            return decode_envelope(response.content, response_type)
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
 
     def _handle_send_message(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
 
@@ -459,6 +1180,22 @@ class HTTPAgentServer:
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
 
+    def _handle_send_batch(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+
+        """Handle batched send HTTP requests; the whole batch travels as one envelope."""
+
+        try:
+            responses = self.communication_protocol.send_messages_batch(
+                request_data['sender'],
+                [
+                    (message['receiver'], message['message_type'], message['content'])
+                    for message in request_data['messages']
+                ]
+            )
+            return {'status': 'success', 'responses': responses}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
     def _handle_broadcast(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
 
         """Handle broadcast message HTTP requests."""
@@ -482,12 +1219,23 @@ class HTTPAgentServer:
             status = self.communication_protocol.get_agent_status(agent_id)
             return {'status': 'success', 'agent_status': status}
         else:
-            # Return all agents status
-            all_status = {
-                agent_id: self.communication_protocol.get_agent_status(agent_id)
-                for agent_id in self.communication_protocol.agents
-            }
-            return {'status': 'success', 'all_agents': all_status}
+            # Return all agents status. Only agents with a ping() hook can
+            # block, so just those are checked concurrently; the rest are
+            # in-memory checks cheaper than handing them to a thread
+            protocol = self.communication_protocol
+            agents = dict(protocol.agents)
+            pinged = [aid for aid, agent in agents.items() if hasattr(agent['instance'], 'ping')]
+
+            all_status: Dict[str, Dict[str, Any]] = {}
+            if len(pinged) > 1:
+                with ThreadPoolExecutor(max_workers=min(32, len(pinged))) as executor:
+                    all_status.update(zip(pinged, executor.map(protocol.get_agent_status, pinged)))
+            for agent_id in agents:
+                if agent_id not in all_status:
+                    all_status[agent_id] = protocol.get_agent_status(agent_id)
+
+            # Keep registration order in the response
+            return {'status': 'success', 'all_agents': {aid: all_status[aid] for aid in agents}}
 
     def _handle_health_check(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
 
@@ -495,25 +1243,37 @@ class HTTPAgentServer:
 
         return {
             'status': 'healthy',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _iso(time.time_ns()),
             'active_agents': len(self.communication_protocol.agents),
             'message_count': len(self.communication_protocol.message_history)
         }
 
-    def process_request(self, endpoint: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
+    def process_request(self, endpoint: str, request_data: Union[Dict[str, Any], bytes],
+                        content_type: Optional[str] = None) -> Union[Dict[str, Any], bytes]:
 
         """
         Process HTTP-like requests (simplified for demonstration).
 
         Args:
             endpoint (str): API endpoint path
-            request_data (Dict[str, Any]): Request payload
+            request_data (Union[Dict[str, Any], bytes]): Request payload, encoded
+                when content_type is given
+            content_type (Optional[str]): Wire format of the request and response
+                (CONTENT_TYPE_MSGPACK or CONTENT_TYPE_JSON); None for in-process dicts
 
         Returns:
-            Dict[str, Any]: Response data
+            Union[Dict[str, Any], bytes]: Response data, encoded when content_type is given
         """
 
-        if endpoint in self.routes:
-            return self.routes[endpoint](request_data)
+        if isinstance(request_data, (bytes, bytearray, str)):
+            request_data = decode_envelope(request_data, content_type or CONTENT_TYPE_JSON)
+
+        handler = self.routes.get(endpoint)
+        if handler is not None:
+            response = handler(request_data)
         else:
-            return {'status': 'error', 'message': f'Unknown endpoint: {endpoint}'} 
\ No newline at end of file
+            response = {'status': 'error', 'message': f'Unknown endpoint: {endpoint}'}
+
+        if content_type is not None:
+            return encode_envelope(response, content_type)
+        return response 
\ No newline at end of file
@@ -13,12 +13,92 @@ The agent follows a multi-phase process:
 4. Study material creation
 """
 
+import asyncio
+import copy
+import hashlib
 import json
-import os
-from google import genai
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from google.genai import types
 from utils.nlp_processor import NLPProcessor
-from utils.information_retrieval import InformationRetrieval
+from utils.information_retrieval import InformationRetrieval, Source
+from utils.llm_cache import LLMCache
+from utils.genai_client import get_genai_client
+
+# Optional: faster parsing of structured (JSON) Gemini responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Lesson outline shared by the single and batched lesson prompts
+_LESSON_SECTIONS = """1. **Overview** - Brief introduction and why this topic matters
+2. **Key Concepts** - Main ideas broken down into digestible pieces
+3. **Detailed Explanations** - Step-by-step explanations with examples
+4. **Real-World Applications** - How this applies in practice
+5. **Study Tips** - How to remember and apply this knowledge
+6. **Summary** - Key takeaways for review"""
+
+# Prompts for _generate_student_friendly_content, filled in with str.format.
+# Kept flush-left so no indentation whitespace is sent (and billed) as input.
+_LESSON_SYSTEM_TEMPLATE = """You are an expert educational content creator specializing in {subject}.
+Create student-friendly educational content that is:
+- Clear and engaging for {difficulty} level learners
+- Well-structured with bullet points and explanations
+- Includes real-world examples and analogies
+- Uses simple language while maintaining accuracy
+- Organized for easy studying and note-taking
+
+Content Type: {content_type}
+Subject Area: {subject}
+Difficulty Level: {difficulty}
+{objectives}"""
+
+_LESSON_USER_TEMPLATE = """Create comprehensive, student-friendly study notes about: {topic}
+{reference}
+Structure the content as:
+""" + _LESSON_SECTIONS + """
+
+Use bullet points, clear headings, and student-friendly language for {difficulty} level.
+Include mnemonics or memory aids where helpful."""
+
+# Structured output for generate_content_batch: one lesson object per topic
+_BATCH_LESSONS_SCHEMA = types.Schema(
+    type=types.Type.ARRAY,
+    items=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            'topic': types.Schema(type=types.Type.STRING),
+            'content': types.Schema(type=types.Type.STRING)
+        },
+        required=['topic', 'content']
+    )
+)
+_BATCH_LESSONS_CONFIG = types.GenerateContentConfig(
+    system_instruction="You are an expert educational content creator.",
+    response_mime_type="application/json",
+    response_schema=_BATCH_LESSONS_SCHEMA
+)
+
+# Keywords that mark a retrieved source as reliable, matched in one regex pass
+_QUALITY_INDICATORS = ('academic', 'peer-reviewed', 'textbook', 'educational', 'university')
+_QUALITY_RE = re.compile('(?=(' + '|'.join(map(re.escape, _QUALITY_INDICATORS)) + '))')
+
+# Topic keywords mapped to the diagram type they suggest (in suggestion order)
+_DIAGRAM_KEYWORDS = {
+    'Process Flow Diagram': ('process', 'cycle', 'steps'),
+    'Labeled Diagram': ('structure', 'anatomy', 'parts'),
+    'Comparison Chart': ('compare', 'vs', 'difference'),
+}
+_DIAGRAM_BY_KEYWORD = {word: diagram for diagram, words in _DIAGRAM_KEYWORDS.items() for word in words}
+_DIAGRAM_RE = re.compile('(?=(' + '|'.join(map(re.escape, _DIAGRAM_BY_KEYWORD)) + '))')
+
+# A line suitable as a study note: once stripped, 21-199 characters long,
+# not a heading, and containing a full stop. Group 1 is the stripped line.
+_BULLET_RE = re.compile(r'^[^\S\n]*(?!#)(?=[^\n]*\.)(\S[^\n]{19,197}\S)[^\S\n]*$', re.MULTILINE)
 
 class ContentGeneratorAgent:
 
@@ -35,15 +115,102 @@ class ContentGeneratorAgent:
         ir_system: Information retrieval system for research
         agent_id: Unique identifier for this agent
     """
+
+    # Topics packed into a single Gemini request by generate_content_batch
+    BATCH_SIZE = 5
+
+    # Characters of each retrieved source passed to Gemini as reference material
+    SOURCE_CONTEXT_CHARS = 500
+
+    # Distinct texts whose NLP analysis is kept by _nlp_analyze
+    NLP_CACHE_SIZE = 128
+
+    # Finished phase 3-4 outputs kept by _finalize_content, keyed by topic and content
+    POST_CACHE_SIZE = 128
+
+    # Completed text (in characters) handed to entity extraction while a response streams
+    STREAM_NLP_CHUNK_CHARS = 1500
+
+    # Numbered section lists for generate_structured_content, built once per structure type
+    _STRUCTURE_PROMPTS = {
+        structure_type: "\n".join(f"{i+1}. {section}" for i, section in enumerate(sections))
+        for structure_type, sections in {
+            "standard": ["Introduction", "Main Content", "Examples", "Conclusion"],
+            "tutorial": ["Prerequisites", "Step-by-Step Guide", "Practice Exercises", "Troubleshooting"],
+            "explanation": ["What is it?", "How does it work?", "Why is it important?", "Real-world applications"],
+            "comparison": ["Overview", "Similarities", "Differences", "When to use each", "Conclusion"]
+        }.items()
+    }
     
     def __init__(self):
-        # Initialize Google Gemini API client for AI content generation
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        # Shared Google Gemini API client (pooled keep-alive connections)
+        self.client = get_genai_client()
         # Initialize NLP processor for text analysis and enhancement
         self.nlp_processor = NLPProcessor()
         # Initialize information retrieval system for research
         self.ir_system = InformationRetrieval()
+        # Cache Gemini responses; repeated (topic, difficulty, subject) prompts skip the API call
+        self.llm_cache = LLMCache()
+        # Request configs per system prompt, built once and reused
+        self._system_configs = {}
+        # NLP analyses keyed by content digest (LRU), shared by phases 3 and 4
+        self._nlp_cache = OrderedDict()
+        self._nlp_cache_lock = threading.Lock()
+        # Enhanced content and study materials per (topic, content) digest (LRU)
+        self._post_cache = OrderedDict()
+        self._post_cache_lock = threading.Lock()
+        # Worker threads for source searches that can overlap (each may call Gemini)
+        self._search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="content-search")
         self.agent_id = "content_generator"
+
+    def close(self):
+        """Stop the source-search worker pool; call on application shutdown."""
+        self._search_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _system_config(self, system_prompt):
+        """Return a GenerateContentConfig carrying the system prompt as system_instruction."""
+        config = self._system_configs.get(system_prompt)
+        if config is None:
+            config = types.GenerateContentConfig(system_instruction=system_prompt)
+            self._system_configs[system_prompt] = config
+        return config
+
+    def _cached_generate(self, system_prompt, user_prompt, model="gemini-2.5-flash", semantic=True, on_chunk=None,
+                         semantic_text=None):
+        """
+        Call Gemini through the response cache (exact match, then semantic match if enabled).
+
+        semantic_text, when given, is embedded for the semantic match in place
+        of the whole user prompt (see LLMCache.get_or_generate).
+
+        When on_chunk is given and the cache misses, the response is streamed
+        and on_chunk is called with each text chunk as it arrives.
+        """
+        def generate():
+            # Sending the system prompt as system_instruction keeps the static
+            # block as a stable prefix, which Gemini's implicit caching reuses
+            if on_chunk is None:
+                response = self.client.models.generate_content(
+                    model=model,
+                    contents=user_prompt,
+                    config=self._system_config(system_prompt)
+                )
+                return response.text
+
+            parts = []
+            for chunk in self.client.models.generate_content_stream(
+                model=model,
+                contents=user_prompt,
+                config=self._system_config(system_prompt)
+            ):
+                if chunk.text:
+                    parts.append(chunk.text)
+                    on_chunk(chunk.text)
+            return "".join(parts)
+
+        return self.llm_cache.get_or_generate(
+            model, system_prompt, user_prompt, generate, semantic=semantic, semantic_text=semantic_text
+        )
     
     def generate_content(self, topic, difficulty="Intermediate", subject="General", content_type="Lesson", learning_objectives=None):
         
@@ -74,188 +241,352 @@ class ContentGeneratorAgent:
         try:
             # Phase 1: Retrieve reliable sources and context for accuracy
             sources = self._retrieve_reliable_sources(topic, subject)
-            context = self._gather_enhanced_context(topic, subject, sources)
+            return self._generate_from_sources(topic, difficulty, subject, content_type, learning_objectives, sources)
             
-            # Phase 2: Generate student-friendly content using AI
-            content = self._generate_student_friendly_content(
-                topic, difficulty, subject, content_type, context, learning_objectives
+        except Exception as e:
+            raise Exception(f"Content generation failed: {str(e)}")
+
+    async def generate_content_async(self, topic, difficulty="Intermediate", subject="General", content_type="Lesson", learning_objectives=None):
+        """
+        Awaitable variant of generate_content for use inside an event loop.
+
+        The academic and educational source searches run concurrently, and the
+        blocking Gemini/NLP phases run in a worker thread so the event loop
+        stays free while content is generated. Returns the same dict as
+        generate_content.
+        """
+        try:
+            sources = await self._retrieve_reliable_sources_async(topic, subject)
+            return await asyncio.to_thread(
+                self._generate_from_sources, topic, difficulty, subject, content_type, learning_objectives, sources
             )
-            
-            # Phase 3: Apply NLP processing for key concepts and better structure
-            processed_content = self._advanced_nlp_processing(content, topic)
-            
-            # Phase 4: Create supplementary study materials
-            study_materials = self._create_study_materials(processed_content, topic)
-            
-            return {
-                'content': processed_content,
-                'study_materials': study_materials,
-                'key_concepts': study_materials.get('key_concepts', []),
-                'learning_objectives': study_materials.get('learning_objectives', []),
-                'difficulty_level': difficulty,
-                'sources': sources
-            }
-            
+
         except Exception as e:
             raise Exception(f"Content generation failed: {str(e)}")
+
+    def _generate_from_sources(self, topic, difficulty, subject, content_type, learning_objectives, sources):
+        """Run phases 2-4 of content generation on already retrieved sources"""
+        context = self._gather_enhanced_context(topic, subject, sources)
+
+        # Phase 2: Generate student-friendly content using AI
+        content = self._generate_student_friendly_content(
+            topic, difficulty, subject, content_type, context, learning_objectives
+        )
+
+        return self._finalize_content(topic, difficulty, content, sources)
+
+    def _finalize_content(self, topic, difficulty, content, sources):
+        """Run phases 3-4 on generated content and assemble the result"""
+        processed_content, study_materials = self._post_process(topic, content)
+
+        return {
+            'content': processed_content,
+            'study_materials': study_materials,
+            'key_concepts': study_materials.get('key_concepts', []),
+            'learning_objectives': study_materials.get('learning_objectives', []),
+            'difficulty_level': difficulty,
+            'sources': sources
+        }
     
+    def _post_process(self, topic, content):
+        """
+        Return (enhanced content, study materials) for generated content.
+
+        Both are fully determined by the topic and the content, so when Gemini
+        output is served from the LLM cache the NLP phases are skipped as well.
+        The cache keeps its own copy of the study materials and every hit gets
+        a fresh deep copy, so callers editing a result cannot change later ones.
+        """
+        key = hashlib.blake2b(f"{topic}\x00{content}".encode('utf-8'), digest_size=16).digest()
+        with self._post_cache_lock:
+            cached = self._post_cache.get(key)
+            if cached is not None:
+                self._post_cache.move_to_end(key)
+        if cached is not None:
+            return cached[0], copy.deepcopy(cached[1])
+
+        # Phase 3: Apply NLP processing for key concepts and better structure
+        processed_content = self._advanced_nlp_processing(content, topic)
+
+        # Phase 4: Create supplementary study materials (reusing the phase 3 analysis)
+        study_materials = self._create_study_materials(processed_content, topic, analyzed_text=content)
+
+        result = (processed_content, study_materials)
+        # Phase 3 returns the content unchanged when NLP fails; don't keep that fallback
+        if processed_content is not content:
+            stored = (processed_content, copy.deepcopy(study_materials))
+            with self._post_cache_lock:
+                self._post_cache[key] = stored
+                if len(self._post_cache) > self.POST_CACHE_SIZE:
+                    self._post_cache.popitem(last=False)
+        return result
+
+    def generate_content_batch(self, items):
+        """
+        Generate content for several topics using one Gemini request per BATCH_SIZE topics.
+
+        Each item is a dict with 'topic' and optionally 'difficulty', 'subject',
+        'content_type' and 'learning_objectives' (same meaning as in
+        generate_content). Source retrieval is skipped to keep the request count
+        down, so results carry empty sources. If a batched response cannot be
+        parsed, its items fall back to individual generate_content calls.
+
+        Args:
+            items (list): Topic specifications
+
+        Returns:
+            list: One generate_content-style result dict per item, in order
+        """
+        no_sources = {'academic': [], 'educational': [], 'quality_score': 0.0}
+        results = []
+
+        for start in range(0, len(items), self.BATCH_SIZE):
+            chunk = items[start:start + self.BATCH_SIZE]
+            lessons = self._generate_lessons_batch(chunk)
+
+            if lessons is None:
+                for item in chunk:
+                    results.append(self.generate_content(
+                        item['topic'],
+                        difficulty=item.get('difficulty', 'Intermediate'),
+                        subject=item.get('subject', 'General'),
+                        content_type=item.get('content_type', 'Lesson'),
+                        learning_objectives=item.get('learning_objectives')
+                    ))
+                continue
+
+            for item, lesson in zip(chunk, lessons):
+                results.append(self._finalize_content(
+                    item['topic'], item.get('difficulty', 'Intermediate'), lesson, no_sources
+                ))
+
+        return results
+
+    def _generate_lessons_batch(self, items):
+        """Request lessons for all items in one structured-output call; None if unusable"""
+        topic_lines = []
+        for i, item in enumerate(items, 1):
+            line = (
+                f"{i}. Topic: {item['topic']} | Subject: {item.get('subject', 'General')} | "
+                f"Difficulty: {item.get('difficulty', 'Intermediate')} | "
+                f"Content Type: {item.get('content_type', 'Lesson')}"
+            )
+            if item.get('learning_objectives'):
+                line += f" | Learning objectives: {', '.join(item['learning_objectives'])}"
+            topic_lines.append(line)
+
+        prompt = f"""Create comprehensive, student-friendly study notes for each topic below, written for the stated difficulty level.
+
+Structure each lesson as:
+{_LESSON_SECTIONS}
+
+Return a JSON array with exactly {len(items)} objects in the same order as the topics,
+each with "topic" and "content" (the lesson as markdown).
+
+Topics:
+{chr(10).join(topic_lines)}"""
+
+        try:
+            response = self.client.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=prompt,
+                config=_BATCH_LESSONS_CONFIG
+            )
+            text = response.text or "[]"
+            lessons = orjson.loads(text) if orjson is not None else json.loads(text)
+        except Exception:
+            return None
+
+        if not isinstance(lessons, list) or len(lessons) != len(items):
+            return None
+        contents = [lesson.get('content') if isinstance(lesson, dict) else None for lesson in lessons]
+        if not all(isinstance(content, str) and content.strip() for content in contents):
+            return None
+        return contents
+
     def _retrieve_reliable_sources(self, topic, subject):
         """Retrieve reliable educational sources"""
         try:
-            # Search multiple source types
+            # Search multiple source types; the educational search runs alongside the academic one
+            web_future = self._search_pool.submit(self.ir_system.search, f"{topic} {subject} educational", "Educational")
             academic_sources = self.ir_system.search(f"{topic} {subject} academic textbook", "Academic")
-            web_sources = self.ir_system.search(f"{topic} {subject} educational", "Educational")
+            web_sources = web_future.result()
             
-            return {
-                'academic': academic_sources[:3],
-                'educational': web_sources[:3],
-                'quality_score': self._assess_source_quality(academic_sources + web_sources)
-            }
+            return self._package_sources(academic_sources, web_sources)
         except Exception:
-            return {'academic': [], 'educational': [], 'quality_score': 0.5}
+            return self._unavailable_sources()
+
+    async def _retrieve_reliable_sources_async(self, topic, subject):
+        """Retrieve reliable educational sources, running both searches concurrently"""
+        try:
+            # Each search may fall back to a Gemini request, so overlap them
+            academic_sources, web_sources = await asyncio.gather(
+                asyncio.to_thread(self.ir_system.search, f"{topic} {subject} academic textbook", "Academic"),
+                asyncio.to_thread(self.ir_system.search, f"{topic} {subject} educational", "Educational")
+            )
+            return self._package_sources(academic_sources, web_sources)
+        except Exception:
+            return self._unavailable_sources()
+
+    @staticmethod
+    def _unavailable_sources():
+        """Sources result used when retrieval is unavailable"""
+        return {'academic': [], 'educational': [], 'quality_score': 0.5}
+
+    def _package_sources(self, academic_sources, web_sources):
+        """Keep the top sources of each kind along with an overall quality score"""
+        return {
+            'academic': academic_sources[:3],
+            'educational': web_sources[:3],
+            'quality_score': self._assess_source_quality(
+                [Source.from_result(source) for source in academic_sources + web_sources]
+            )
+        }
     
     def _gather_enhanced_context(self, topic, subject, sources):
         """Enhanced context gathering with source reliability"""
         try:
             context_parts = []
-            
-            # Prioritize academic sources
-            for source in sources.get('academic', []):
-                context_parts.append(f"Academic Source: {source.get('title', 'Unknown')}\n{source.get('content', '')}")
-            
-            # Add educational sources
-            for source in sources.get('educational', []):
-                context_parts.append(f"Educational Source: {source.get('title', 'Unknown')}\n{source.get('content', '')}")
-            
+            seen_titles = set()
+            limit = self.SOURCE_CONTEXT_CHARS
+
+            # Prioritize academic sources; a source found by both searches is sent once
+            for label, key in (("Academic Source", 'academic'), ("Educational Source", 'educational')):
+                for source in map(Source.from_result, sources.get(key, [])):
+                    title = source.title or 'Unknown'
+                    if title != 'Unknown':
+                        if title in seen_titles:
+                            continue
+                        seen_titles.add(title)
+                    # Only a prompt-sized prefix of each source is useful (and billed)
+                    context_parts.append(f"{label}: {title}\n{source.content[:limit]}")
+
             return "\n\n".join(context_parts)
         except Exception:
             return ""
     
     def _assess_source_quality(self, sources):
-        """Assess quality of retrieved sources"""
+        """Assess quality of retrieved sources (a list of Source records)"""
         if not sources:
             return 0.0
         
-        quality_indicators = ['academic', 'peer-reviewed', 'textbook', 'educational', 'university']
         total_score = 0
         
         for source in sources:
-            score = 0
-            content = (source.get('title', '') + ' ' + source.get('content', '')).lower()
-            for indicator in quality_indicators:
-                if indicator in content:
-                    score += 1
-            total_score += score / len(quality_indicators)
+            # One scan finds every indicator present instead of one scan per indicator
+            matched = set(_QUALITY_RE.findall(f"{source.title} {source.content}".lower()))
+            total_score += len(matched) / len(_QUALITY_INDICATORS)
         
         return min(total_score / len(sources), 1.0)
     
-    def _gather_context(self, topic, subject):
-        """Gather relevant context using information retrieval"""
-        try:
-            search_results = self.ir_system.search(f"{topic} {subject}", "General")
-            
-            if search_results:
-                # Combine top 3 results for context
-                context_parts = []
-                for result in search_results[:3]:
-                    context_parts.append(result['content'][:500])  # Limit context size
-                
-                return " ".join(context_parts)
-            
-            return ""
-            
-        except Exception:
-            return ""  # Fallback to no additional context
-    
-    def _generate_with_llm(self, topic, difficulty, subject, content_type, context):
-        """Generate content using OpenAI GPT"""
-        
-        system_prompt = f"""You are an expert educational content generator specializing in {subject}. 
-        Create high-quality, engaging educational content that is:
-        - Appropriate for {difficulty} level learners
-        - Structured and well-organized
-        - Includes relevant examples and explanations
-        - Uses clear, educational language
-        - Incorporates best pedagogical practices
-        
-        Content Type: {content_type}
-        Subject Area: {subject}
-        Difficulty Level: {difficulty}
-        """
-        
-        user_prompt = f"""Create comprehensive educational content about: {topic}
-        
-        {f"Additional Context: {context}" if context else ""}
-        
-        Please structure the content with:
-        1. Introduction/Overview
-        2. Key Concepts
-        3. Detailed Explanations
-        4. Examples
-        5. Summary/Key Takeaways
-        
-        Make it engaging and educational for {difficulty} level students in {subject}.
-        """
-        
-        response = self.client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=f"{system_prompt}\n\n{user_prompt}"
-        )
-        
-        return response.text or "Content generation failed"
-    
     def _generate_student_friendly_content(self, topic, difficulty, subject, content_type, context, learning_objectives):
         """Generate student-friendly content with clear structure"""
         objectives_text = ""
         if learning_objectives:
             objectives_text = f"Focus on these learning objectives: {', '.join(learning_objectives)}"
         
-        system_prompt = f"""You are an expert educational content creator specializing in {subject}. 
-        Create student-friendly educational content that is:
-        - Clear and engaging for {difficulty} level learners
-        - Well-structured with bullet points and explanations
-        - Includes real-world examples and analogies
-        - Uses simple language while maintaining accuracy
-        - Organized for easy studying and note-taking
-        
-        Content Type: {content_type}
-        Subject Area: {subject}
-        Difficulty Level: {difficulty}
-        {objectives_text}
-        """
-        
-        user_prompt = f"""Create comprehensive, student-friendly study notes about: {topic}
-        
-        {f"Reference Material: {context}" if context else ""}
+        system_prompt = _LESSON_SYSTEM_TEMPLATE.format(
+            subject=subject, difficulty=difficulty, content_type=content_type, objectives=objectives_text
+        ).rstrip()
         
-        Structure the content as:
-        1. **Overview** - Brief introduction and why this topic matters
-        2. **Key Concepts** - Main ideas broken down into digestible pieces
-        3. **Detailed Explanations** - Step-by-step explanations with examples
-        4. **Real-World Applications** - How this applies in practice
-        5. **Study Tips** - How to remember and apply this knowledge
-        6. **Summary** - Key takeaways for review
-        
-        Use bullet points, clear headings, and student-friendly language for {difficulty} level.
-        Include mnemonics or memory aids where helpful.
-        """
-        
-        response = self.client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=f"{system_prompt}\n\n{user_prompt}"
+        user_prompt = _LESSON_USER_TEMPLATE.format(
+            topic=topic,
+            reference=f"\nReference Material: {context}\n" if context else "",
+            difficulty=difficulty
         )
-        
-        return response.text or "Content generation failed"
+
+        # Stream the response and run entity extraction on completed paragraphs
+        # while the rest is still being generated; phase 3 then finds the
+        # analysis already cached instead of starting NER after the last token
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = []
+            buffer = []
+
+            def on_chunk(text):
+                buffer.append(text)
+                if sum(map(len, buffer)) < self.STREAM_NLP_CHUNK_CHARS:
+                    return
+                window = "".join(buffer)
+                cut = window.rfind("\n\n")
+                if cut > 0:
+                    pending.append(executor.submit(self.nlp_processor.extract_entities, window[:cut]))
+                    buffer[:] = [window[cut:]]
+
+            # Match semantically on the topic alone: the rest of the user prompt is
+            # section boilerplate that would make lessons on related topics (e.g.
+            # Newton's first and third laws) look like the same request
+            semantic_text = topic
+            if learning_objectives:
+                semantic_text += f"\n{', '.join(learning_objectives)}"
+            content = self._cached_generate(
+                system_prompt, user_prompt, on_chunk=on_chunk, semantic_text=semantic_text
+            )
+
+            if content and pending:
+                rest = "".join(buffer)
+                if rest.strip():
+                    pending.append(executor.submit(self.nlp_processor.extract_entities, rest))
+                try:
+                    # Merge per-window entities in text order
+                    entities = [entity for future in pending for entity in future.result()]
+                    self._nlp_analyze(content, entities=entities)
+                except Exception:
+                    pass  # Phase 3 analyzes the full text itself
+
+        return content or "Content generation failed"
     
+    def _nlp_analyze(self, content, entities=None):
+        """
+        Extract entities, key terms and a summary, once per distinct text.
+
+        Entities already extracted elsewhere (e.g. while streaming) can be
+        passed in to skip NER; the result is cached either way. Repeats of the
+        same entity text are dropped in both cases, so streamed and
+        non-streamed generation yield the same entity list. As with the
+        post-processing cache, callers always get their own deep copy.
+        """
+        key = hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+        with self._nlp_cache_lock:
+            analysis = self._nlp_cache.get(key)
+            if analysis is not None:
+                self._nlp_cache.move_to_end(key)
+        if analysis is not None:
+            return copy.deepcopy(analysis)
+
+        if entities is None:
+            entities = self.nlp_processor.extract_entities(content)
+        analysis = {
+            'entities': self._dedupe_entities(entities),
+            'key_terms': [p['phrase'] for p in self.nlp_processor.extract_key_phrases(content, max_phrases=15)],
+            'summary': self.nlp_processor.summarize_text(content)
+        }
+
+        stored = copy.deepcopy(analysis)
+        with self._nlp_cache_lock:
+            self._nlp_cache[key] = stored
+            if len(self._nlp_cache) > self.NLP_CACHE_SIZE:
+                self._nlp_cache.popitem(last=False)
+        return analysis
+
+    @staticmethod
+    def _dedupe_entities(entities):
+        """Keep the first occurrence of each entity text (case-insensitive), in order"""
+        unique, seen = [], set()
+        for entity in entities:
+            name = entity['text'].lower()
+            if name not in seen:
+                seen.add(name)
+                unique.append(entity)
+        return unique
+
     def _advanced_nlp_processing(self, content, topic):
         """Advanced NLP processing for key concepts and structure"""
         try:
-            # Extract key entities and concepts using NLP
-            entities = self.nlp_processor.extract_entities(content)
-            key_terms = self.nlp_processor.extract_key_terms(content)
-            
-            # Generate improved summary
-            summary = self.nlp_processor.summarize_text(content)
+            # Extract key entities, concepts and an improved summary using NLP
+            analysis = self._nlp_analyze(content)
+            entities = analysis['entities']
+            key_terms = analysis['key_terms']
+            summary = analysis['summary']
             
             # Create structured content with NLP insights
             enhanced_content = f"""# {topic}
@@ -287,21 +618,24 @@ class ContentGeneratorAgent:
             # Fallback to original content if NLP processing fails
             return content
     
-    def _create_study_materials(self, content, topic):
-        """Create comprehensive study materials including flashcards and diagrams"""
+    def _create_study_materials(self, content, topic, analyzed_text=None):
+        """
+        Create comprehensive study materials including flashcards and diagrams.
+
+        Concepts are extracted from analyzed_text when given (the raw generated
+        content, already analyzed in phase 3), otherwise from content.
+        """
         try:
             # Extract key concepts for flashcards
-            entities = self.nlp_processor.extract_entities(content)
-            key_terms = self.nlp_processor.extract_key_terms(content)
+            entities = self._nlp_analyze(analyzed_text or content)['entities']
+            key_concepts = [entity['text'] for entity in entities[:15]]
             
-            # Create flashcard concepts
-            flashcard_concepts = []
-            for entity in entities[:10]:
-                flashcard_concepts.append({
-                    'term': entity['text'],
-                    'definition': f"Key concept in {topic}",
-                    'category': entity.get('label', 'CONCEPT')
-                })
+            # Create flashcard concepts from the first ten key concepts
+            definition = f"Key concept in {topic}"
+            flashcard_concepts = [
+                {'term': term, 'definition': definition, 'category': entity.get('label', 'CONCEPT')}
+                for term, entity in zip(key_concepts[:10], entities)
+            ]
             
             # Generate learning objectives
             objectives = [
@@ -313,7 +647,7 @@ class ContentGeneratorAgent:
             
             return {
                 'flashcards': flashcard_concepts,
-                'key_concepts': [ent['text'] for ent in entities[:15]],
+                'key_concepts': key_concepts,
                 'learning_objectives': objectives,
                 'study_notes': self._create_bullet_notes(content),
                 'diagram_suggestions': self._suggest_diagrams(topic, entities)
@@ -330,30 +664,15 @@ class ContentGeneratorAgent:
     
     def _create_bullet_notes(self, content):
         """Create bullet-point study notes from content"""
-        lines = content.split('\n')
-        bullet_notes = []
-        
-        for line in lines:
-            line = line.strip()
-            if line and len(line) > 20 and not line.startswith('#'):
-                if '.' in line and len(line) < 200:  # Good for bullet points
-                    bullet_notes.append(f"• {line}")
-        
-        return '\n'.join(bullet_notes[:15])  # Limit to 15 key points
+        # One regex scan picks qualifying lines; stop after 15 key points
+        matches = islice(_BULLET_RE.finditer(content), 15)
+        return '\n'.join(f"• {match.group(1)}" for match in matches)
     
     def _suggest_diagrams(self, topic, entities):
         """Suggest diagram types based on topic and entities"""
-        suggestions = []
-        
-        # Common diagram types for educational content
-        if any(word in topic.lower() for word in ['process', 'cycle', 'steps']):
-            suggestions.append('Process Flow Diagram')
-        
-        if any(word in topic.lower() for word in ['structure', 'anatomy', 'parts']):
-            suggestions.append('Labeled Diagram')
-        
-        if any(word in topic.lower() for word in ['compare', 'vs', 'difference']):
-            suggestions.append('Comparison Chart')
+        # Common diagram types for educational content, from one scan of the topic
+        matched = {_DIAGRAM_BY_KEYWORD[word] for word in _DIAGRAM_RE.findall(topic.lower())}
+        suggestions = [diagram for diagram in _DIAGRAM_KEYWORDS if diagram in matched]
         
         if len(entities) > 5:
             suggestions.append('Mind Map')
@@ -363,60 +682,21 @@ class ContentGeneratorAgent:
         
         return suggestions[:3]  # Return top 3 suggestions
     
-    def _enhance_content(self, content, topic):
-        """Enhance content using NLP processing"""
-        try:
-            # Extract key entities and concepts
-            entities = self.nlp_processor.extract_entities(content)
-            
-            # Generate summary
-            summary = self.nlp_processor.summarize_text(content)
-            
-            # Add NLP enhancements to content
-            enhanced_content = f"""# {topic}
-
-{content}
-
----
-
-## 📋 Key Summary
-{summary}
-
-## 🔑 Key Concepts Identified
-{', '.join([ent['text'] for ent in entities[:10]])}  
-
-"""
-            
-            return enhanced_content
-            
-        except Exception:
-            # Fallback to original content if NLP processing fails
-            return content
-    
     def generate_structured_content(self, topic, structure_type="standard"):
         """Generate content with specific structure"""
         
-        structures = {
-            "standard": ["Introduction", "Main Content", "Examples", "Conclusion"],
-            "tutorial": ["Prerequisites", "Step-by-Step Guide", "Practice Exercises", "Troubleshooting"],
-            "explanation": ["What is it?", "How does it work?", "Why is it important?", "Real-world applications"],
-            "comparison": ["Overview", "Similarities", "Differences", "When to use each", "Conclusion"]
-        }
-        
-        structure = structures.get(structure_type, structures["standard"])
+        sections = self._STRUCTURE_PROMPTS.get(structure_type) or self._STRUCTURE_PROMPTS["standard"]
         
         structured_prompt = f"""Create educational content about {topic} using this structure:
 
-{chr(10).join([f"{i+1}. {section}" for i, section in enumerate(structure)])}
+{sections}
 
 Make each section comprehensive and educational."""
         
-        response = self.client.models.generate_content(
-            model="gemini-2.5-flash", 
-            contents=f"You are an expert educational content creator.\n\n{structured_prompt}"
+        return (
+            self._cached_generate("You are an expert educational content creator.", structured_prompt, semantic=False)
+            or "Structured content generation failed"
         )
-        
-        return response.text or "Structured content generation failed"
     
     def adapt_content_difficulty(self, content, target_difficulty):
         """Adapt existing content to different difficulty level"""
@@ -433,9 +713,11 @@ Adjust:
 
 Make it appropriate for {target_difficulty} learners while maintaining accuracy."""
         
-        response = self.client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=f"You are an expert at adapting educational content for different skill levels.\n\n{adaptation_prompt}"
+        return (
+            self._cached_generate(
+                "You are an expert at adapting educational content for different skill levels.",
+                adaptation_prompt,
+                semantic=False
+            )
+            or "Content adaptation failed"
         )
-        
-        return response.text or "Content adaptation failed"
@@ -26,14 +26,169 @@ Dependencies:
     - json, re, datetime: Standard library utilities
 """
 
+import bisect
+import functools
 import json
-import os
-from google import genai
-from google.genai import types
+import random
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from google.genai import errors, types
 from utils.nlp_processor import NLPProcessor
+from utils.llm_cache import LLMCache
+from utils.genai_client import get_genai_client
 import re
 from datetime import datetime
 
+# Optional: faster parsing of Gemini's JSON responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Rubric and response format for evaluating a single text answer
+_TEXT_EVAL_SYSTEM_PROMPT = """You are an expert educational evaluator. Evaluate student answers fairly and constructively.
+
+        Return your evaluation in JSON format:
+        {
+            "score": number (0-100),
+            "feedback": "detailed feedback explaining the score",
+            "strengths": ["strength 1", "strength 2"],
+            "improvements": ["area for improvement 1", "area 2"]
+        }"""
+
+# Sent as system_instruction so the static rubric stays a stable prompt prefix
+# that Gemini's implicit caching can reuse across evaluations
+_TEXT_EVAL_CONFIG = types.GenerateContentConfig(system_instruction=_TEXT_EVAL_SYSTEM_PROMPT)
+
+_STUDY_ADVISOR_SYSTEM_PROMPT = "You are a helpful study advisor providing specific, actionable learning recommendations."
+_STUDY_ADVISOR_CONFIG = types.GenerateContentConfig(system_instruction=_STUDY_ADVISOR_SYSTEM_PROMPT)
+_ADAPTIVE_ADVISOR_CONFIG = types.GenerateContentConfig(
+    system_instruction="You are an expert study advisor. Provide specific, actionable study recommendations."
+)
+# Fixed text of the adaptive suggestions prompt; only the three pattern fields vary
+_ADAPTIVE_USER_TEMPLATE = """Create personalized study suggestions for a student with:
+
+            Weak Concepts: {weak_concepts}
+            Difficulty Struggles: {difficulty_issues}
+            Learning Level Gaps: {bloom_gaps}
+
+            Provide 3-5 specific study strategies that address these patterns:
+            1. Focus areas for review
+            2. Recommended study methods
+            3. Practice suggestions
+            4. Resources to use
+            5. Timeline for improvement
+
+            Make suggestions practical and achievable."""
+
+# What every text-answer evaluation should weigh, single or batched
+_TEXT_EVAL_CRITERIA = """Consider:
+- Accuracy of information
+- Completeness of answer
+- Understanding demonstrated
+- Clarity of explanation
+
+Be encouraging but honest about areas for improvement."""
+
+# Question keywords mapped to the weak area a missed question points to (in priority order)
+_WEAK_AREA_KEYWORDS = {
+    "Definitions and terminology": ('definition', 'define'),
+    "Practical applications": ('example', 'application'),
+    "Comparisons and contrasts": ('compare', 'difference'),
+}
+_WEAK_AREA_BY_KEYWORD = {word: area for area, words in _WEAK_AREA_KEYWORDS.items() for word in words}
+_WEAK_AREA_RE = re.compile('(?=(' + '|'.join(map(re.escape, _WEAK_AREA_BY_KEYWORD)) + '))')
+
+# Targeted study tip per weak area, for suggestions built without Gemini
+_WEAK_AREA_TIPS = {
+    "Definitions and terminology": "📖 Make flashcards for the key terms and define each one in your own words",
+    "Practical applications": "🛠️ Work through a real-world example of each concept you missed",
+    "Comparisons and contrasts": "⚖️ Build a side-by-side table of the concepts you mixed up",
+    "Core concepts": "🧩 Re-read the explanations behind the questions you missed and summarize them",
+}
+
+# Generic study tips, and the complete suggestions text used when there are no weak areas to target
+_STUDY_SUGGESTIONS_HEADING = "## 💡 Study Suggestions\n\n"
+_GENERIC_STUDY_TIPS = "\n".join([
+    "📚 Review the fundamental concepts and definitions",
+    "💡 Practice with additional examples and exercises",
+    "🔄 Create your own summary notes of key points",
+    "👥 Form a study group to discuss challenging topics",
+    "🎯 Focus extra time on areas where you missed questions"
+])
+_FALLBACK_STUDY_SUGGESTIONS = _STUDY_SUGGESTIONS_HEADING + _GENERIC_STUDY_TIPS
+
+# Score bands (lower bounds) and the level name and message for each band, lowest first
+_PERFORMANCE_THRESHOLDS = (60, 70, 80, 90)
+_PERFORMANCE_LEVELS = ("Requires Additional Study", "Needs Improvement", "Satisfactory", "Good", "Excellent")
+_PERFORMANCE_MESSAGES = (
+    "📚 Review the material and try again. You can do it!",
+    "💪 Keep practicing! You're making progress.",
+    "👍 Good work! You're on the right track.",
+    "🎉 Great job! You have a solid understanding.",
+    "🌟 Outstanding performance! You've mastered this material.",
+)
+
+# Strength and improvement messages per difficulty (the breakdown only has these three)
+_DIFFICULTY_STRENGTHS = {d: f"Excellent {d.lower()} question performance" for d in ("Easy", "Medium", "Hard")}
+_DIFFICULTY_IMPROVEMENTS = {d: f"Practice more {d.lower()} questions" for d in ("Easy", "Medium", "Hard")}
+
+
+# Correct count, question count and mean score of a list of evaluations
+_Aggregate = namedtuple('_Aggregate', ['correct', 'total', 'avg_score'])
+
+
+@dataclass(slots=True)
+class _ResultScan:
+    """Aggregates of a list of evaluation results, gathered in one pass by _scan_results"""
+    total: int = 0
+    satisfactory: int = 0  # Scores of 70 or more
+    high_scores: int = 0  # Scores of 85 or more
+    difficulty_perf: dict = field(default_factory=dict)
+    bloom_perf: dict = field(default_factory=dict)
+
+
+@functools.lru_cache(maxsize=4096)
+def _answer_key(correct_answer):
+    """Stripped, lowercased answer key, normalized once per distinct key rather than per student"""
+    return correct_answer.strip().lower()
+
+
+@functools.lru_cache(maxsize=4096)
+def _ref_tokens(ref_text):
+    """Lowercased word set of a reference answer, tokenized once per distinct text"""
+    return frozenset(ref_text.lower().split())
+
+
+@functools.lru_cache(maxsize=4096)
+def _parsed_evaluation(text):
+    """Scored evaluation parsed from a response text (JSON decoded once per distinct text)"""
+    return FeedbackEvaluatorAgent._scored_evaluation(FeedbackEvaluatorAgent._parse_llm_json(text))
+
+
+# Structured output for evaluating several text answers in one request
+_BATCH_EVALUATIONS_CONFIG = types.GenerateContentConfig(
+    system_instruction="You are an expert educational evaluator. Evaluate student answers fairly and constructively.",
+    response_mime_type="application/json",
+    response_schema=types.Schema(
+        type=types.Type.ARRAY,
+        items=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                'index': types.Schema(type=types.Type.INTEGER),
+                'score': types.Schema(type=types.Type.NUMBER),
+                'feedback': types.Schema(type=types.Type.STRING)
+            },
+            required=['index', 'score', 'feedback']
+        )
+    )
+)
+
 class FeedbackEvaluatorAgent:
     """
     Feedback Evaluator Agent for analyzing student responses and providing personalized feedback.
@@ -45,16 +200,42 @@ class FeedbackEvaluatorAgent:
     Attributes:
         client: Google Gemini API client for AI-powered evaluation
         nlp_processor: NLP processor for text analysis and similarity calculation
+        llm_cache: Cache of Gemini responses; near-identical answers to a question reuse an evaluation
         agent_id: Unique identifier for this agent
     """
 
+    # Gemini requests this agent has in flight at once (evaluations and suggestions run in parallel)
+    MAX_CONCURRENT_EVALUATIONS = 5
+    # Retries of a rate-limited (429) request, with jittered exponential backoff
+    RATE_LIMIT_RETRIES = 2
+    # Strengths or improvement areas reported at most
+    MAX_INSIGHTS = 5
+
     def __init__(self):
         """Initialize the feedback evaluator agent with required dependencies."""
         # Using Google Gemini 2.5 Flash for free AI feedback evaluation
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        # Shared Google Gemini API client (pooled keep-alive connections)
+        self.client = get_genai_client()
         self.nlp_processor = NLPProcessor()
+        # A class answering the same quiz produces many near-duplicate text answers
+        self.llm_cache = LLMCache(maxsize=10_000)
+        self._gemini_slots = threading.BoundedSemaphore(self.MAX_CONCURRENT_EVALUATIONS)
+        # Runs the study-suggestion request alongside text-answer evaluation when possible
+        self._background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="feedback-background")
+        # Evaluation method per question type (anything else uses _evaluate_generic)
+        self._evaluators = {
+            'Multiple Choice': self._evaluate_mcq,
+            'True/False': self._evaluate_true_false,
+            'Short Answer': self._evaluate_text_answer,
+            'Essay': self._evaluate_text_answer,
+            'Fill in the Blank': self._evaluate_fill_blank,
+        }
         self.agent_id = "feedback_evaluator"
 
+    def close(self):
+        """Stop the background worker pool; call on application shutdown."""
+        self._background.shutdown(wait=False, cancel_futures=True)
+
     def evaluate_answers(self, questions, user_answers, feedback_type="Detailed", include_suggestions=True):
         """
         Evaluate user answers and provide comprehensive feedback.
@@ -83,43 +264,61 @@ class FeedbackEvaluatorAgent:
         Raises:
             Exception: If evaluation process fails
         """
+        suggestions_future = None
         try:
-            # Evaluate each answer individually
+            # Evaluate each answer; written answers are collected and sent to Gemini together
             individual_evaluations = []
-            correct_count = 0
-            total_score = 0
+            pending_text = []
 
             for i, question in enumerate(questions):
                 # Handle both integer and string keys for flexibility
                 user_answer = user_answers.get(i)
                 if user_answer is None:
                     user_answer = user_answers.get(str(i), "")
-                evaluation = self._evaluate_single_answer(question, user_answer)
-                individual_evaluations.append(evaluation)
-
-                if evaluation['is_correct']:
-                    correct_count += 1
-
-                total_score += evaluation['score']
+                if question.get('type') in ('Short Answer', 'Essay') and user_answer.strip():
+                    pending_text.append((i, question, user_answer))
+                    individual_evaluations.append(None)
+                else:
+                    individual_evaluations.append(self._evaluate_single_answer(question, user_answer))
+
+            # Study suggestions depend only on the weak areas of missed questions. When no
+            # written answer could add a new area, request them while those are evaluated.
+            if include_suggestions and pending_text:
+                known_areas = {
+                    self._weak_area(evaluation['question_text']) for evaluation in individual_evaluations
+                    if evaluation is not None and not evaluation['is_correct']
+                }
+                # A single area is answered from a local template, so only a Gemini request is worth starting early
+                if len(known_areas) > 1 and all(
+                    self._weak_area(question['question']) in known_areas for _, question, _ in pending_text
+                ):
+                    suggestions_future = self._background.submit(self._study_suggestions_for, known_areas)
+
+            if pending_text:
+                evaluations = self._llm_evaluate_text_answers([(q, a) for _, q, a in pending_text])
+                for (i, question, user_answer), evaluation in zip(pending_text, evaluations):
+                    individual_evaluations[i] = self._text_answer_result(question, user_answer, evaluation)
 
             # Calculate overall performance metrics
-            overall_score = (total_score / len(questions)) if questions else 0
+            correct_count, _, overall_score = self._aggregate(individual_evaluations)
 
             # Generate comprehensive feedback based on type
             detailed_feedback = self._generate_detailed_feedback(
                 individual_evaluations, feedback_type
             )
 
+            # Analyze learning patterns and performance trends
+            learning_analysis = self._analyze_learning_patterns(individual_evaluations)
+
             # Generate personalized study suggestions if requested
             study_suggestions = ""
-            if include_suggestions:
+            if suggestions_future is not None:
+                study_suggestions = suggestions_future.result()
+            elif include_suggestions:
                 study_suggestions = self._generate_study_suggestions(
                     individual_evaluations, questions
                 )
 
-            # Analyze learning patterns and performance trends
-            learning_analysis = self._analyze_learning_patterns(individual_evaluations)
-
             feedback_result = {
                 'overall_score': round(overall_score, 1),
                 'correct_count': correct_count,
@@ -136,6 +335,9 @@ class FeedbackEvaluatorAgent:
             return feedback_result
 
         except Exception as e:
+            # Don't leave an early suggestions request queued for a failed evaluation
+            if suggestions_future is not None:
+                suggestions_future.cancel()
             raise Exception(f"Answer evaluation failed: {str(e)}")
 
     def _evaluate_single_answer(self, question, user_answer):
@@ -152,19 +354,8 @@ class FeedbackEvaluatorAgent:
         Returns:
             dict: Evaluation results with score, correctness, and feedback
         """
-        question_type = question.get('type', 'Unknown')
-        correct_answer = question.get('correct_answer', '')
-
-        if question_type == 'Multiple Choice':
-            return self._evaluate_mcq(question, user_answer)
-        elif question_type == 'True/False':
-            return self._evaluate_true_false(question, user_answer)
-        elif question_type in ['Short Answer', 'Essay']:
-            return self._evaluate_text_answer(question, user_answer)
-        elif question_type == 'Fill in the Blank':
-            return self._evaluate_fill_blank(question, user_answer)
-        else:
-            return self._evaluate_generic(question, user_answer)
+        evaluate = self._evaluators.get(question.get('type', 'Unknown'), self._evaluate_generic)
+        return evaluate(question, user_answer)
 
     def _evaluate_mcq(self, question, user_answer):
         
@@ -205,7 +396,7 @@ class FeedbackEvaluatorAgent:
         """
         
         correct_answer = question.get('correct_answer', '')
-        is_correct = user_answer.strip().lower() == correct_answer.strip().lower()
+        is_correct = user_answer.strip().lower() == _answer_key(correct_answer)
 
         return {
             'question_text': question['question'],
@@ -245,6 +436,20 @@ class FeedbackEvaluatorAgent:
         # Use LLM for sophisticated text evaluation
         evaluation = self._llm_evaluate_text_answer(question, user_answer)
 
+        return self._text_answer_result(question, user_answer, evaluation)
+
+    def _text_answer_result(self, question, user_answer, evaluation):
+        """
+        Build the evaluation record for a text answer from its LLM evaluation.
+
+        Args:
+            question (dict): Text question with sample answer
+            user_answer (str): Student's written response
+            evaluation (dict): Score (0-100) and feedback for the answer
+
+        Returns:
+            dict: Evaluation results with score, correctness, and feedback
+        """
         return {
             'question_text': question['question'],
             'user_answer': user_answer,
@@ -274,12 +479,13 @@ class FeedbackEvaluatorAgent:
 
         # Flexible matching for fill-in-the-blank
         user_clean = user_answer.strip().lower()
-        correct_clean = correct_answer.strip().lower()
+        correct_clean = _answer_key(correct_answer)
 
-        # Check exact match or partial containment
-        is_correct = (user_clean == correct_clean or
-                     user_clean in correct_clean or
-                     correct_clean in user_clean)
+        # Check exact match or partial containment: only the shorter string can occur
+        # in the longer one, so a single scan covers both directions (and equality)
+        shorter, longer = ((user_clean, correct_clean) if len(user_clean) <= len(correct_clean)
+                           else (correct_clean, user_clean))
+        is_correct = shorter in longer if shorter else user_clean == correct_clean
 
         return {
             'question_text': question['question'],
@@ -349,62 +555,203 @@ class FeedbackEvaluatorAgent:
             dict: Evaluation with score (0-100) and detailed feedback
         """
         
-        system_prompt = """You are an expert educational evaluator. Evaluate student answers fairly and constructively.
+        system_prompt = _TEXT_EVAL_SYSTEM_PROMPT
+        user_prompt = self._text_evaluation_prompt(question, user_answer)
 
-        Return your evaluation in JSON format:
-        {
-            "score": number (0-100),
-            "feedback": "detailed feedback explaining the score",
-            "strengths": ["strength 1", "strength 2"],
-            "improvements": ["area for improvement 1", "area 2"]
-        }"""
+        def generate():
+            response = self._generate_with_backoff(
+                model="gemini-2.5-flash",
+                contents=user_prompt,
+                config=_TEXT_EVAL_CONFIG
+            )
+            # Raises on malformed JSON, so only usable evaluations are cached
+            self._evaluation_from_text(response.text)
+            return response.text
 
-        sample_answer = question.get('sample_answer', '')
-        key_points = question.get('key_points', [])
+        try:
+            # Semantic matches compare the question and answer only, not the shared rubric text
+            text = self.llm_cache.get_or_generate(
+                "gemini-2.5-flash", system_prompt, user_prompt, generate,
+                semantic_text=f"{question['question']}||{user_answer}"
+            )
+            return self._evaluation_from_text(text)
 
-        user_prompt = f"""Evaluate this student answer:
+        except Exception:
+            # Fallback to simpler evaluation if LLM fails
+            return self._fallback_text_evaluation(question, user_answer)
 
-Question: {question['question']}
+    def _llm_evaluate_text_answers(self, items):
+        """
+        Evaluate several text answers with as few Gemini requests as possible.
 
-Student Answer: {user_answer}
+        Cached evaluations are used first; the remaining answers are evaluated
+        in one batched request, and each result is cached under its
+        single-answer prompt. If the batch fails, the answers go through
+        _llm_evaluate_text_answer concurrently on a small thread pool.
 
-Sample/Expected Answer: {sample_answer}
+        Args:
+            items (list): (question, user_answer) pairs
 
-Key Points to Look For: {', '.join(key_points) if key_points else 'General understanding and accuracy'}
+        Returns:
+            list: One evaluation dict (score and feedback) per pair, in order
+        """
+        evaluations = [None] * len(items)
+        misses = []
+
+        # Answers missing an exact cache hit are embedded in one batched model call
+        user_prompts = [self._text_evaluation_prompt(question, user_answer) for question, user_answer in items]
+        lookups = self.llm_cache.lookup_many(
+            "gemini-2.5-flash", _TEXT_EVAL_SYSTEM_PROMPT, user_prompts,
+            semantic_texts=[f"{question['question']}||{user_answer}" for question, user_answer in items]
+        )
+        for n, (user_prompt, (cached, query_vec)) in enumerate(zip(user_prompts, lookups)):
+            if cached is not None:
+                evaluations[n] = self._evaluation_from_text(cached)
+            else:
+                misses.append((n, user_prompt, query_vec))
+
+        if len(misses) > 1:
+            batch = self._llm_evaluate_text_answers_batch([items[n] for n, _, _ in misses])
+            if batch is not None:
+                for (n, user_prompt, query_vec), evaluation in zip(misses, batch):
+                    evaluations[n] = evaluation
+                    self.llm_cache.set(
+                        "gemini-2.5-flash", _TEXT_EVAL_SYSTEM_PROMPT, user_prompt,
+                        json.dumps(evaluation), query_vec=query_vec
+                    )
+
+        remaining = [n for n, evaluation in enumerate(evaluations) if evaluation is None]
+        if remaining:
+            # Each call is a network wait, so they overlap well on threads
+            workers = min(len(remaining), self.MAX_CONCURRENT_EVALUATIONS)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(lambda n: self._llm_evaluate_text_answer(*items[n]), remaining)
+                for n, evaluation in zip(remaining, results):
+                    evaluations[n] = evaluation
+        return evaluations
+
+    def _llm_evaluate_text_answers_batch(self, items):
+        """
+        Evaluate several text answers in one structured-output Gemini request.
 
-Provide a score (0-100) and constructive feedback. Consider:
-- Accuracy of information
-- Completeness of answer
-- Understanding demonstrated
-- Clarity of explanation
+        Args:
+            items (list): (question, user_answer) pairs
 
-Be encouraging but honest about areas for improvement."""
+        Returns:
+            list: Evaluation dicts in item order, or None if the response is unusable
+        """
+        answers = "\n\n".join(
+            f"Answer {n}:\n{self._answer_details(question, user_answer)}"
+            for n, (question, user_answer) in enumerate(items, 1)
+        )
+        prompt = f"""Evaluate each of these {len(items)} student answers independently.
+
+Provide a score (0-100) and constructive feedback for each. {_TEXT_EVAL_CRITERIA}
+
+Return a JSON array with exactly {len(items)} objects, each with "index" (the answer number), "score" and "feedback".
+
+{answers}"""
 
         try:
-            response = self.client.models.generate_content(
+            response = self._generate_with_backoff(
                 model="gemini-2.5-flash",
-                contents=f"{system_prompt}\n\n{user_prompt}"
+                contents=prompt,
+                config=_BATCH_EVALUATIONS_CONFIG
             )
+            results = _json_loads(response.text or "[]")
+            by_index = {result['index']: result for result in results}
+            if sorted(by_index) != list(range(1, len(items) + 1)):
+                return None
+            return [self._scored_evaluation(by_index[n]) for n in range(1, len(items) + 1)]
+        except Exception:
+            return None
+
+    def _generate_with_backoff(self, **kwargs):
+        """
+        Call generate_content within the agent's concurrency limit, retrying rate limits.
 
-            if response.text:
-                text = response.text.strip()
-                # Clean up markdown formatting if present
-                if text.startswith('```json'):
-                    text = text[7:-3].strip()
-                elif text.startswith('```'):
-                    text = text[3:-3].strip()
+        A 429 response is retried up to RATE_LIMIT_RETRIES times after a
+        jittered, exponentially growing pause, so parallel evaluations that
+        hit the limit together do not all retry at the same moment.
 
-                result = json.loads(text)
-            else:
-                result = {}
-            return {
-                'score': max(0, min(100, result.get('score', 0))),
-                'feedback': result.get('feedback', 'No feedback available.')
-            }
+        Args:
+            **kwargs: Arguments for client.models.generate_content
 
-        except Exception:
-            # Fallback to simpler evaluation if LLM fails
-            return self._fallback_text_evaluation(question, user_answer)
+        Returns:
+            GenerateContentResponse: The Gemini response
+        """
+        for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+            with self._gemini_slots:
+                try:
+                    return self.client.models.generate_content(**kwargs)
+                except errors.ClientError as e:
+                    if e.code != 429 or attempt == self.RATE_LIMIT_RETRIES:
+                        raise
+            time.sleep(random.uniform(0.5, 1.5) * 2 ** attempt)
+
+    def _text_evaluation_prompt(self, question, user_answer):
+        """
+        Build the Gemini prompt for evaluating a single text answer.
+
+        Args:
+            question (dict): Question with sample answer and key points
+            user_answer (str): Student's response
+
+        Returns:
+            str: User prompt for the evaluation request
+        """
+        return f"""Evaluate this student answer:
+
+{self._answer_details(question, user_answer)}
+
+Provide a score (0-100) and constructive feedback. {_TEXT_EVAL_CRITERIA}"""
+
+    @staticmethod
+    def _answer_details(question, user_answer):
+        """Question, answer, reference answer and key points as given to the evaluator"""
+        key_points = question.get('key_points', [])
+        return f"""Question: {question['question']}
+
+Student Answer: {user_answer}
+
+Sample/Expected Answer: {question.get('sample_answer', '')}
+
+Key Points to Look For: {', '.join(key_points) if key_points else 'General understanding and accuracy'}"""
+
+    @staticmethod
+    def _evaluation_from_text(text):
+        """
+        Scored evaluation from a Gemini (or cached) response.
+
+        Cache hits return the same few response texts over and over, so each
+        distinct text is parsed once and later hits only copy the result.
+        """
+        return dict(_parsed_evaluation(text))
+
+    @staticmethod
+    def _scored_evaluation(result):
+        """Score (clamped to 0-100) and feedback from a parsed LLM evaluation"""
+        return {
+            'score': max(0, min(100, result.get('score', 0))),
+            'feedback': result.get('feedback', 'No feedback available.')
+        }
+
+    @staticmethod
+    def _parse_llm_json(text):
+        """
+        Parse a JSON object from a Gemini response, tolerating markdown code fences.
+
+        Args:
+            text (str): Raw response text (may be None or empty)
+
+        Returns:
+            dict: Parsed object, or an empty dict for an empty response
+        """
+        if not text:
+            return {}
+        # Clean up markdown formatting if present
+        text = text.strip().removeprefix('```json').removeprefix('```').removesuffix('```').strip()
+        return _json_loads(text)
 
     def _fallback_text_evaluation(self, question, user_answer):
         """
@@ -417,14 +764,12 @@ Be encouraging but honest about areas for improvement."""
         Returns:
             dict: Basic evaluation with keyword overlap scoring
         """
-        sample_answer = question.get('sample_answer', '').lower()
-        user_lower = user_answer.lower()
+        sample_answer = question.get('sample_answer', '')
 
-        # Simple keyword matching approach
+        # Simple keyword matching approach (the answer's words are streamed into the intersection)
         if sample_answer:
-            sample_words = set(sample_answer.split())
-            user_words = set(user_lower.split())
-            overlap = len(sample_words.intersection(user_words))
+            sample_words = _ref_tokens(sample_answer)
+            overlap = len(sample_words.intersection(user_answer.lower().split()))
             score = min(100, (overlap / len(sample_words)) * 100) if sample_words else 50
         else:
             score = 50  # Give partial credit if no sample answer available
@@ -434,6 +779,26 @@ Be encouraging but honest about areas for improvement."""
             'feedback': f"Answer evaluated. Score: {score:.0f}%. Consider expanding your response with more specific details."
         }
 
+    @staticmethod
+    def _aggregate(evaluations):
+        """
+        Count correct answers and average the scores in a single pass.
+
+        Args:
+            evaluations (list): Individual question evaluations
+
+        Returns:
+            _Aggregate: Correct count, number of evaluations and mean score (0 if none)
+        """
+        correct = 0
+        score_sum = 0
+        for evaluation in evaluations:
+            score_sum += evaluation['score']
+            if evaluation['is_correct']:
+                correct += 1
+        total = len(evaluations)
+        return _Aggregate(correct, total, score_sum / total if total else 0)
+
     def _generate_detailed_feedback(self, evaluations, feedback_type):
         """
         Generate comprehensive feedback based on specified type.
@@ -464,9 +829,7 @@ Be encouraging but honest about areas for improvement."""
         Returns:
             str: Detailed markdown-formatted feedback
         """
-        total_questions = len(evaluations)
-        correct_answers = sum(1 for eval in evaluations if eval['is_correct'])
-        avg_score = sum(eval['score'] for eval in evaluations) / total_questions if evaluations else 0
+        correct_answers, total_questions, avg_score = self._aggregate(evaluations)
 
         feedback_parts = [
             f"## 📊 Performance Summary",
@@ -477,11 +840,12 @@ Be encouraging but honest about areas for improvement."""
             "## 📝 Question-by-Question Analysis"
         ]
 
-        for i, eval in enumerate(evaluations, 1):
-            status = "✅" if eval['is_correct'] else "❌"
-            feedback_parts.append(f"**Question {i}** {status} (Score: {eval['score']:.0f}%)")
-            feedback_parts.append(f"*Feedback:* {eval['feedback']}")
-            feedback_parts.append("")
+        # One block per question (heading, feedback, blank line), built by a single f-string
+        feedback_parts.extend(
+            f"**Question {i}** {'✅' if eval['is_correct'] else '❌'} (Score: {eval['score']:.0f}%)\n"
+            f"*Feedback:* {eval['feedback']}\n"
+            for i, eval in enumerate(evaluations, 1)
+        )
 
         return "\n".join(feedback_parts)
 
@@ -495,9 +859,7 @@ Be encouraging but honest about areas for improvement."""
         Returns:
             str: Concise performance summary
         """
-        correct = sum(1 for eval in evaluations if eval['is_correct'])
-        total = len(evaluations)
-        avg_score = sum(eval['score'] for eval in evaluations) / total if evaluations else 0
+        correct, total, avg_score = self._aggregate(evaluations)
 
         return f"""## 📊 Quick Summary
 **Score:** {avg_score:.1f}% | **Correct:** {correct}/{total}
@@ -540,8 +902,7 @@ Be encouraging but honest about areas for improvement."""
         Returns:
             str: Motivational feedback based on performance
         """
-        correct = sum(1 for eval in evaluations if eval['is_correct'])
-        total = len(evaluations)
+        correct, total, _ = self._aggregate(evaluations)
 
         if correct == total:
             return "🌟 Outstanding! Perfect score! You've mastered this material completely!"
@@ -566,39 +927,63 @@ Be encouraging but honest about areas for improvement."""
             str: Personalized study recommendations
         """
         # Identify problem areas from incorrect answers
-        weak_areas = []
-        question_types_missed = []
-
-        for eval in evaluations:
-            if not eval['is_correct']:
-                # Extract topic from question (simplified analysis)
-                question_text = eval['question_text'].lower()
-
-                # Simple topic extraction based on keywords
-                if 'definition' in question_text or 'define' in question_text:
-                    weak_areas.append("Definitions and terminology")
-                elif 'example' in question_text or 'application' in question_text:
-                    weak_areas.append("Practical applications")
-                elif 'compare' in question_text or 'difference' in question_text:
-                    weak_areas.append("Comparisons and contrasts")
-                else:
-                    weak_areas.append("Core concepts")
+        weak_areas = {self._weak_area(eval['question_text']) for eval in evaluations if not eval['is_correct']}
+        return self._study_suggestions_for(weak_areas)
+
+    @staticmethod
+    def _weak_area(question_text):
+        """
+        Classify the topic a missed question points to.
+
+        Args:
+            question_text (str): Text of the question
+
+        Returns:
+            str: Weak area label ("Core concepts" if no keyword matches)
+        """
+        # Simple topic extraction: one scan finds every keyword in the question
+        matched = {_WEAK_AREA_BY_KEYWORD[word] for word in _WEAK_AREA_RE.findall(question_text.lower())}
+        return next((area for area in _WEAK_AREA_KEYWORDS if area in matched), "Core concepts")
+
+    def _study_suggestions_for(self, weak_areas):
+        """
+        Generate study suggestions for a set of weak areas.
+
+        Args:
+            weak_areas (set): Weak area labels of the missed questions
 
-        # Generate AI-powered suggestions if weak areas identified
+        Returns:
+            str: Personalized study recommendations
+        """
+        # Gemini is skipped whenever every missed question falls under the same
+        # weak area, however many questions that is (e.g. all in "Core concepts");
+        # the prompt would only name that one area, so a targeted template
+        # answers it without a round trip
+        if len(weak_areas) == 1:
+            return self._fallback_study_suggestions(weak_areas)
+
+        # Generate AI-powered suggestions if several weak areas identified
         if weak_areas:
+            # Sorted so the same set of weak areas always yields the same (cacheable) prompt
             suggestions_prompt = f"""Based on these learning weaknesses, provide 3-5 specific study suggestions:
 
-Weak areas identified: {', '.join(set(weak_areas))}
+Weak areas identified: {', '.join(sorted(weak_areas))}
 
 Provide actionable study recommendations that address these specific areas."""
 
-            try:
-                response = self.client.models.generate_content(
+            def generate():
+                return self._generate_with_backoff(
                     model="gemini-2.5-flash",
-                    contents=f"You are a helpful study advisor providing specific, actionable learning recommendations.\n\n{suggestions_prompt}"
-                )
+                    contents=suggestions_prompt,
+                    config=_STUDY_ADVISOR_CONFIG
+                ).text
 
-                return response.text or "No suggestions available"
+            try:
+                # Only a handful of weak-area combinations exist, so exact matching suffices
+                text = self.llm_cache.get_or_generate(
+                    "gemini-2.5-flash", _STUDY_ADVISOR_SYSTEM_PROMPT, suggestions_prompt, generate, semantic=False
+                )
+                return text or "No suggestions available"
 
             except Exception:
                 return self._fallback_study_suggestions([])
@@ -666,11 +1051,10 @@ Provide actionable study recommendations that address these specific areas."""
                 return min(100, similarity * 100)
 
             # Simple keyword matching fallback
-            user_words = set(user_answer.lower().split())
-            expected_words = set(expected_answer.lower().split())
+            expected_words = _ref_tokens(expected_answer)
 
             if expected_words:
-                overlap = len(user_words.intersection(expected_words))
+                overlap = len(expected_words.intersection(user_answer.lower().split()))
                 similarity = overlap / len(expected_words)
                 return min(100, similarity * 100)
 
@@ -744,10 +1128,7 @@ Provide actionable study recommendations that address these specific areas."""
                              "4. Learning progress indicators\n"
                              "5. Motivational guidance\n\n"
                              "Be encouraging but honest about areas for improvement.")
-            total_questions = len(results)
-            correct_answers = len([r for r in results if r['score'] >= 70])
-            difficulty_breakdown = self._analyze_difficulty_performance(results)
-            bloom_breakdown = self._analyze_bloom_performance(results)
+            scan = self._scan_results(results)
             trend = ""
             if performance_history and hasattr(self, '_analyze_performance_trend'):
                 try:
@@ -755,16 +1136,17 @@ Provide actionable study recommendations that address these specific areas."""
                 except Exception:
                     trend = ""
             user_prompt = ("Provide comprehensive feedback for a student who:\n"
-                           f"- Answered {total_questions} questions\n"
-                           f"- Got {correct_answers} answers satisfactory or better (≥70%)\n"
+                           f"- Answered {scan.total} questions\n"
+                           f"- Got {scan.satisfactory} answers satisfactory or better (≥70%)\n"
                            f"- Overall score: {avg_score:.1f}%\n"
-                           f"- Difficulty performance: {difficulty_breakdown}\n"
-                           f"- Bloom's taxonomy performance: {bloom_breakdown}\n\n"
+                           f"- Difficulty performance: {scan.difficulty_perf}\n"
+                           f"- Bloom's taxonomy performance: {scan.bloom_perf}\n\n"
                            f"{trend}\n\n"
                            "Provide specific, actionable feedback that acknowledges strengths and guides improvement.")
-            response = self.client.models.generate_content(
+            response = self._generate_with_backoff(
                 model="gemini-2.5-flash",
-                contents=f"{system_prompt}\n\n{user_prompt}"
+                contents=user_prompt,
+                config=types.GenerateContentConfig(system_instruction=system_prompt)
             )
             return response.text or "Good effort! Keep practicing to improve your understanding."
         except Exception:
@@ -799,8 +1181,8 @@ Provide actionable study recommendations that address these specific areas."""
         """
         try:
             # Identify weak concepts
-            weak_concepts = [concept for concept, scores in concept_scores.items()
-                           if sum(scores)/len(scores) < 70]
+            weak_concepts = [concept for concept, mean in self._concept_means(concept_scores).items()
+                             if mean < 70]
 
             # Identify difficulty patterns
             difficulty_issues = self._identify_difficulty_patterns(results)
@@ -808,26 +1190,16 @@ Provide actionable study recommendations that address these specific areas."""
             # Identify Bloom level gaps
             bloom_gaps = self._identify_bloom_gaps(results)
 
-            system_prompt = """You are an expert study advisor. Provide specific, actionable study recommendations."""
-
-            user_prompt = f"""Create personalized study suggestions for a student with:
-
-            Weak Concepts: {', '.join(weak_concepts[:5]) if weak_concepts else 'None identified'}
-            Difficulty Struggles: {difficulty_issues}
-            Learning Level Gaps: {bloom_gaps}
-
-            Provide 3-5 specific study strategies that address these patterns:
-            1. Focus areas for review
-            2. Recommended study methods
-            3. Practice suggestions
-            4. Resources to use
-            5. Timeline for improvement
-
-            Make suggestions practical and achievable."""
+            user_prompt = _ADAPTIVE_USER_TEMPLATE.format(
+                weak_concepts=', '.join(weak_concepts[:5]) if weak_concepts else 'None identified',
+                difficulty_issues=difficulty_issues,
+                bloom_gaps=bloom_gaps
+            )
 
-            response = self.client.models.generate_content(
+            response = self._generate_with_backoff(
                 model="gemini-2.5-flash",
-                contents=f"{system_prompt}\n\n{user_prompt}"
+                contents=user_prompt,
+                config=_ADAPTIVE_ADVISOR_CONFIG
             )
 
             return response.text or "Continue practicing and reviewing key concepts."
@@ -835,93 +1207,98 @@ Provide actionable study recommendations that address these specific areas."""
         except Exception:
             return "Focus on reviewing missed concepts and practice similar questions."
 
-    def _analyze_difficulty_performance(self, results):
+    def _scan_results(self, results):
         """
-        Analyze performance by difficulty level.
+        Gather every aggregate the results analyses need in one walk over the results.
 
         Args:
-            results (list): Evaluation results with difficulty metadata
+            results (list): Evaluation results with difficulty and Bloom level metadata
 
         Returns:
-            dict: Average scores by difficulty level
+            _ResultScan: Score counts and the mean score per difficulty level and
+                per Bloom level, rounded to one decimal
         """
-        difficulty_scores = {"Easy": [], "Medium": [], "Hard": []}
+        difficulty_totals = {"Easy": [0, 0], "Medium": [0, 0], "Hard": [0, 0]}
+        bloom_totals = defaultdict(lambda: [0, 0])
+        satisfactory = high_scores = 0
 
         for result in results:
-            difficulty = result.get('difficulty', 'Medium')
-            if difficulty in difficulty_scores:
-                difficulty_scores[difficulty].append(result['score'])
-
-        performance = {}
-        for difficulty, scores in difficulty_scores.items():
-            if scores:
-                performance[difficulty] = round(sum(scores) / len(scores), 1)
-
-        return performance
-
-    def _analyze_bloom_performance(self, results):
+            score = result['score']
+            if score >= 70:
+                satisfactory += 1
+                if score >= 85:
+                    high_scores += 1
+            bucket = difficulty_totals.get(result.get('difficulty', 'Medium'))
+            if bucket is not None:
+                bucket[0] += score
+                bucket[1] += 1
+            bucket = bloom_totals[result.get('bloom_level', 'Unknown')]
+            bucket[0] += score
+            bucket[1] += 1
+
+        return _ResultScan(
+            total=len(results),
+            satisfactory=satisfactory,
+            high_scores=high_scores,
+            difficulty_perf={difficulty: round(total / count, 1)
+                             for difficulty, (total, count) in difficulty_totals.items() if count},
+            bloom_perf={level: round(total / count, 1) for level, (total, count) in bloom_totals.items()}
+        )
+
+    @staticmethod
+    def _concept_means(concept_scores):
         """
-        Analyze performance by Bloom's taxonomy level.
+        Mean score per concept.
 
         Args:
-            results (list): Evaluation results with Bloom level metadata
+            concept_scores (dict): Scores per concept
 
         Returns:
-            dict: Average scores by Bloom level
+            dict: Mean score per concept (concepts without scores are left out)
         """
-        bloom_scores = {}
-
-        for result in results:
-            bloom_level = result.get('bloom_level', 'Unknown')
-            if bloom_level not in bloom_scores:
-                bloom_scores[bloom_level] = []
-            bloom_scores[bloom_level].append(result['score'])
-
-        performance = {}
-        for level, scores in bloom_scores.items():
-            if scores:
-                performance[level] = round(sum(scores) / len(scores), 1)
+        return {concept: sum(scores) / len(scores) for concept, scores in concept_scores.items() if scores}
 
-        return performance
-
-    def _identify_strengths(self, results):
+    def _identify_strengths(self, results, scan=None):
         """
         Identify student's strengths based on performance analysis.
 
         Args:
             results (list): Evaluation results
+            scan (_ResultScan, optional): Precomputed _scan_results(results)
 
         Returns:
             list: List of identified strengths
         """
         strengths = []
+        if scan is None:
+            scan = self._scan_results(results)
 
         # High-scoring areas
-        high_scores = [r for r in results if r['score'] >= 85]
-        if len(high_scores) > len(results) * 0.5:
+        if scan.high_scores > scan.total * 0.5:
             strengths.append("Strong overall understanding")
 
         # Difficulty strengths
-        difficulty_perf = self._analyze_difficulty_performance(results)
-        for difficulty, score in difficulty_perf.items():
+        for difficulty, score in scan.difficulty_perf.items():
             if score >= 80:
-                strengths.append(f"Excellent {difficulty.lower()} question performance")
+                strengths.append(_DIFFICULTY_STRENGTHS[difficulty])
 
-        # Bloom level strengths
-        bloom_perf = self._analyze_bloom_performance(results)
-        for level, score in bloom_perf.items():
+        # Bloom level strengths (the only open-ended group, so the cap is checked here)
+        for level, score in scan.bloom_perf.items():
             if score >= 80:
                 strengths.append(f"Strong {level.lower()} skills")
+                if len(strengths) == self.MAX_INSIGHTS:
+                    break
 
-        return strengths[:5]  # Top 5 strengths
+        return strengths  # Top 5 strengths
 
-    def _identify_improvement_areas(self, results, concept_scores):
+    def _identify_improvement_areas(self, results, concept_scores, scan=None):
         """
         Identify areas needing improvement.
 
         Args:
             results (list): Evaluation results
             concept_scores (dict): Concept-wise performance scores
+            scan (_ResultScan, optional): Precomputed _scan_results(results)
 
         Returns:
             list: List of improvement areas...
@@ -929,41 +1306,41 @@ Provide actionable study recommendations that address these specific areas."""
         improvements = []
 
         # Low-scoring concepts
-        weak_concepts = [concept for concept, scores in concept_scores.items()
-                        if sum(scores)/len(scores) < 60]
+        weak_concepts = [concept for concept, mean in self._concept_means(concept_scores).items()
+                         if mean < 60]
         if weak_concepts:
             improvements.append(f"Review concepts: {', '.join(weak_concepts[:3])}")
 
         # Difficulty areas
-        difficulty_perf = self._analyze_difficulty_performance(results)
-        for difficulty, score in difficulty_perf.items():
+        if scan is None:
+            scan = self._scan_results(results)
+        for difficulty, score in scan.difficulty_perf.items():
             if score < 60:
-                improvements.append(f"Practice more {difficulty.lower()} questions")
+                improvements.append(_DIFFICULTY_IMPROVEMENTS[difficulty])
 
-        # Bloom level gaps
-        bloom_perf = self._analyze_bloom_performance(results)
-        for level, score in bloom_perf.items():
+        # Bloom level gaps (the only open-ended group, so the cap is checked here)
+        for level, score in scan.bloom_perf.items():
             if score < 60:
                 improvements.append(f"Develop {level.lower()} skills")
+                if len(improvements) == self.MAX_INSIGHTS:
+                    break
 
-        return improvements[:5]  # Top 5 improvement areas
+        return improvements  # Top 5 improvement areas
 
     def _fallback_study_suggestions(self, weak_areas):
         """
-        Fallback study suggestions when AI generation fails.
+        Templated study suggestions, used when AI generation fails or is not needed.
 
-        Returns:
-            str: Generic study recommendations in markdown format
-        """
-        suggestions = [
-            "📚 Review the fundamental concepts and definitions",
-            "💡 Practice with additional examples and exercises",
-            "🔄 Create your own summary notes of key points",
-            "👥 Form a study group to discuss challenging topics",
-            "🎯 Focus extra time on areas where you missed questions"
-        ]
+        Args:
+            weak_areas (iterable): Weak area labels to add targeted tips for (may be empty)
 
-        return "## 💡 Study Suggestions\n\n" + "\n".join(suggestions)
+        Returns:
+            str: Study recommendations in markdown format
+        """
+        if not weak_areas:
+            return _FALLBACK_STUDY_SUGGESTIONS
+        tips = "\n".join(_WEAK_AREA_TIPS[area] for area in sorted(weak_areas))
+        return f"{_STUDY_SUGGESTIONS_HEADING}{tips}\n{_GENERIC_STUDY_TIPS}"
 
     def _analyze_learning_patterns(self, evaluations):
         """
@@ -975,31 +1352,33 @@ Provide actionable study recommendations that address these specific areas."""
         Returns:
             dict: Analysis of learning patterns including accuracy, strengths, and weaknesses
         """
-        total_questions = len(evaluations)
-        if total_questions == 0:
+        if not evaluations:
             return {}
 
-        patterns = {
-            'accuracy_rate': sum(1 for eval in evaluations if eval['is_correct']) / total_questions,
-            'average_score': sum(eval['score'] for eval in evaluations) / total_questions,
+        # Correct count and mean score come from one pass over the evaluations
+        correct, total_questions, average_score = self._aggregate(evaluations)
+        accuracy_rate = correct / total_questions
+        strengths = []
+        weaknesses = []
+
+        # Identify strengths and weaknesses based on performance (each metric is one or the other, or neither)
+        if accuracy_rate >= 0.8:
+            strengths.append("High overall accuracy")
+        elif accuracy_rate < 0.6:
+            weaknesses.append("Needs improvement in basic concepts")
+        if average_score >= 85:
+            strengths.append("Strong detailed understanding")
+        elif average_score < 70:
+            weaknesses.append("Could benefit from more detailed explanations")
+
+        return {
+            'accuracy_rate': accuracy_rate,
+            'average_score': average_score,
             'question_types_performance': {},
-            'strengths': [],
-            'weaknesses': []
+            'strengths': strengths,
+            'weaknesses': weaknesses
         }
 
-        # Identify strengths and weaknesses based on performance
-        if patterns['accuracy_rate'] >= 0.8:
-            patterns['strengths'].append("High overall accuracy")
-        if patterns['average_score'] >= 85:
-            patterns['strengths'].append("Strong detailed understanding")
-
-        if patterns['accuracy_rate'] < 0.6:
-            patterns['weaknesses'].append("Needs improvement in basic concepts")
-        if patterns['average_score'] < 70:
-            patterns['weaknesses'].append("Could benefit from more detailed explanations")
-
-        return patterns
-
     def _get_performance_level(self, score):
         """
         Get performance level description based on score.
@@ -1010,16 +1389,7 @@ Provide actionable study recommendations that address these specific areas."""
         Returns:
             str: Performance level description
         """
-        if score >= 90:
-            return "Excellent"
-        elif score >= 80:
-            return "Good"
-        elif score >= 70:
-            return "Satisfactory"
-        elif score >= 60:
-            return "Needs Improvement"
-        else:
-            return "Requires Additional Study"
+        return _PERFORMANCE_LEVELS[bisect.bisect_right(_PERFORMANCE_THRESHOLDS, score)]
 
     def _get_performance_message(self, score):
         """
@@ -1031,13 +1401,4 @@ Provide actionable study recommendations that address these specific areas."""
         Returns:
             str: Motivational message with emoji
         """
-        if score >= 90:
-            return "🌟 Outstanding performance! You've mastered this material."
-        elif score >= 80:
-            return "🎉 Great job! You have a solid understanding."
-        elif score >= 70:
-            return "👍 Good work! You're on the right track."
-        elif score >= 60:
-            return "💪 Keep practicing! You're making progress."
-        else:
-            return "📚 Review the material and try again. You can do it!"
+        return _PERFORMANCE_MESSAGES[bisect.bisect_right(_PERFORMANCE_THRESHOLDS, score)]
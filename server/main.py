@@ -25,7 +25,9 @@ from .routers.questions import router as questions_router
 from .routers.answers import router as answers_router
 from .routers.progress import router as progress_router
 from .routers.billing import router as billing_router
+from .routers import answers as answers_routes, content as content_routes
 from .vector import build_vector_index, build_content_index, index_status, save_index, load_index
+from utils.genai_client import close_genai_client
 
 # Create FastAPI application instance with metadata
 app = FastAPI(
@@ -60,8 +62,11 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close database connection on app shutdown"""
+    """Close database connection, agent worker pools and the shared Gemini connection pool on app shutdown"""
     await close_db()
+    content_routes._content_agent.close()
+    answers_routes._feedback_agent.close()
+    close_genai_client()
 
 @app.get("/health")
 async def health():
@@ -228,7 +228,7 @@ async def generate_content(payload: ContentRequest, response: Response, user=Dep
             except Exception:
                 pass
 
-        result = _content_agent.generate_content(
+        result = await _content_agent.generate_content_async(
             topic=payload.topic,
             difficulty=payload.difficulty,
             subject=payload.subject,
@@ -0,0 +1,222 @@
+import threading
+import time
+
+import pytest
+
+from agents.communication import AgentCommunicationProtocol
+
+TIMEOUT = 3
+
+
+class StubAgent:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, topic):
+        self.calls += 1
+        return {'content': f"Lesson on {topic}"}
+
+    def generate_questions(self, content):
+        raise RuntimeError("question setter crashed")
+
+
+@pytest.fixture()
+def protocol():
+    protocol = AgentCommunicationProtocol()
+    protocol.register_agent('content_generator', StubAgent(), ['content'])
+    yield protocol
+    protocol.close()
+
+
+def test_send_message_returns_handler_result(protocol):
+    response = protocol.send_message('tester', 'content_generator', 'generate_content', {'topic': 'Cells'})
+
+    assert response == {'status': 'success', 'data': {'content': "Lesson on Cells"}}
+    history = protocol.get_message_history()
+    assert history[-1]['status'] == 'delivered'
+    assert history[-1]['content_keys'] == ['topic']
+
+
+def test_async_send_resolves_future(protocol):
+    future = protocol.send_message('tester', 'content_generator', 'generate_content', {'topic': 'Cells'}, mode='async')
+
+    assert future.result(timeout=TIMEOUT)['status'] == 'success'
+
+
+def test_handler_exception_resolves_future_and_keeps_worker(protocol):
+    future = protocol.submit_message('tester', 'content_generator', 'generate_questions', {'content': 'x'})
+
+    with pytest.raises(RuntimeError, match="question setter crashed"):
+        future.result(timeout=TIMEOUT)
+    assert protocol.get_message_history()[-1]['status'] == 'failed'
+
+    # Every worker is still alive and serving the inbox
+    followups = [
+        protocol.submit_message('tester', 'content_generator', 'generate_content', {'topic': str(n)})
+        for n in range(2 * AgentCommunicationProtocol.WORKERS_PER_AGENT)
+    ]
+    assert all(f.result(timeout=TIMEOUT)['status'] == 'success' for f in followups)
+
+
+def test_none_payload_does_not_hang(protocol):
+    health = protocol.submit_message('tester', 'content_generator', 'health_check', None)
+    assert health.result(timeout=TIMEOUT)['status'] == 'success'
+    assert protocol.get_message_history()[-1]['content_keys'] == []
+
+    bad = protocol.submit_message('tester', 'content_generator', 'generate_content', None)
+    with pytest.raises(TypeError):
+        bad.result(timeout=TIMEOUT)
+
+    response = protocol.submit_message('tester', 'content_generator', 'generate_content', {'topic': 'Cells'})
+    assert response.result(timeout=TIMEOUT)['status'] == 'success'
+
+
+def test_close_stops_workers_and_rejects_messages():
+    protocol = AgentCommunicationProtocol()
+    protocol.register_agent('content_generator', StubAgent(), ['content'])
+    workers = protocol.agents['content_generator']['workers']
+
+    protocol.close()
+
+    assert not any(worker.is_alive() for worker in workers)
+    with pytest.raises(RuntimeError, match="closed"):
+        protocol.submit_message('tester', 'content_generator', 'generate_content', {'topic': 'Cells'})
+
+
+def test_concurrent_sends_with_history_reads(protocol):
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                protocol.get_message_history(limit=100)
+                protocol.get_communication_logs(limit=100)
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    futures = [
+        protocol.submit_message('tester', 'content_generator', 'generate_content', {'topic': str(n)})
+        for n in range(2000)
+    ]
+    for future in futures:
+        future.result(timeout=TIMEOUT)
+    done.set()
+    reader.join()
+
+    assert errors == []
+    timestamps = [record.ts_ns for record in protocol.message_history]
+    assert timestamps == sorted(timestamps)
+
+
+class FlakyAgent:
+    def __init__(self):
+        self.failing = True
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def generate_content(self, topic):
+        self.calls += 1
+        self.release.wait(TIMEOUT)
+        if self.failing:
+            raise RuntimeError("agent down")
+        return {'content': topic}
+
+
+@pytest.fixture()
+def breaker():
+    protocol = AgentCommunicationProtocol()
+    protocol.BREAKER_THRESHOLD = 2
+    protocol.BREAKER_BASE_BACKOFF = 0.05
+    agent = FlakyAgent()
+    protocol.register_agent('content_generator', agent, ['content'])
+    yield protocol, agent
+    agent.release.set()
+    protocol.close()
+
+
+def _send(protocol, content):
+    return protocol.submit_message('tester', 'content_generator', 'generate_content', content)
+
+
+def _trip(protocol):
+    for _ in range(protocol.BREAKER_THRESHOLD):
+        with pytest.raises(RuntimeError, match="agent down"):
+            _send(protocol, {'topic': 'x'}).result(timeout=TIMEOUT)
+
+
+def test_breaker_opens_and_fast_fails(breaker):
+    protocol, agent = breaker
+    _trip(protocol)
+
+    with pytest.raises(RuntimeError, match="unavailable"):
+        _send(protocol, {'topic': 'x'}).result(timeout=TIMEOUT)
+    assert agent.calls == protocol.BREAKER_THRESHOLD
+    status = protocol.get_agent_status('content_generator')
+    assert status['status'] == 'unavailable'
+    assert status['responsive'] is False
+
+
+def test_caller_errors_do_not_open_breaker(breaker):
+    protocol, agent = breaker
+    agent.failing = False
+
+    for _ in range(3 * protocol.BREAKER_THRESHOLD):
+        with pytest.raises(TypeError):
+            _send(protocol, {'wrong_argument': 1}).result(timeout=TIMEOUT)
+
+    assert _send(protocol, {'topic': 'x'}).result(timeout=TIMEOUT)['status'] == 'success'
+
+
+def test_single_probe_after_backoff_closes_breaker(breaker):
+    protocol, agent = breaker
+    _trip(protocol)
+    agent.failing = False
+    agent.release.clear()
+    time.sleep(0.1)
+
+    probe = _send(protocol, {'topic': 'probe'})
+    # Only the probe is let through while it is in flight
+    with pytest.raises(RuntimeError, match="unavailable"):
+        _send(protocol, {'topic': 'x'}).result(timeout=TIMEOUT)
+
+    agent.release.set()
+    assert probe.result(timeout=TIMEOUT)['status'] == 'success'
+    assert 'content_generator' not in protocol._breaker
+    assert _send(protocol, {'topic': 'x'}).result(timeout=TIMEOUT)['status'] == 'success'
+
+
+def test_failed_probe_reopens_breaker(breaker):
+    protocol, agent = breaker
+    _trip(protocol)
+    time.sleep(0.1)
+
+    with pytest.raises(RuntimeError, match="agent down"):
+        _send(protocol, {'topic': 'probe'}).result(timeout=TIMEOUT)
+    with pytest.raises(RuntimeError, match="unavailable"):
+        _send(protocol, {'topic': 'x'}).result(timeout=TIMEOUT)
+    assert protocol._breaker['content_generator'][0] == protocol.BREAKER_THRESHOLD + 1
+
+
+def test_probe_failing_on_caller_error_lets_next_probe_through(breaker):
+    protocol, agent = breaker
+    _trip(protocol)
+    agent.failing = False
+    time.sleep(0.1)
+
+    with pytest.raises(TypeError):
+        _send(protocol, {'wrong_argument': 1}).result(timeout=TIMEOUT)
+    assert _send(protocol, {'topic': 'x'}).result(timeout=TIMEOUT)['status'] == 'success'
+
+
+def test_batch_logging_applies_retention():
+    protocol = AgentCommunicationProtocol(retention_hours=1)
+    protocol._log_communication('tester', 'old', 'expired entry')
+    protocol.communication_logs[0].ts_ns -= 2 * 3600 * 10**9
+
+    protocol._log_communication_batch([('tester', 'broadcast', 'fresh entry')])
+
+    assert [log['action'] for log in protocol.get_communication_logs()] == ['broadcast']
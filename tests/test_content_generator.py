@@ -0,0 +1,165 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import utils.embedding as embedding
+from agents.content_generator import ContentGeneratorAgent
+from utils.llm_cache import LLMCache
+
+
+def _bag_of_words(text: str) -> np.ndarray:
+    # Deterministic stand-in for the sentence embedder: texts sharing most
+    # of their words get a high cosine similarity
+    vec = np.zeros(256, dtype=np.float32)
+    for word in text.lower().split():
+        vec[zlib.crc32(word.encode("utf-8")) % 256] += 1.0
+    return vec / (np.linalg.norm(vec) or 1.0)
+
+
+class StubNLP:
+    def __init__(self):
+        self.calls = []
+
+    def extract_entities(self, text):
+        self.calls.append("extract_entities")
+        return [{'text': 'Chlorophyll', 'label': 'CONCEPT'}, {'text': 'Glucose', 'label': 'CONCEPT'}]
+
+    def extract_key_phrases(self, text, max_phrases=10):
+        self.calls.append("extract_key_phrases")
+        return [{'phrase': 'light energy', 'score': 2}, {'phrase': 'carbon dioxide', 'score': 1}]
+
+    def summarize_text(self, text, max_sentences=3):
+        self.calls.append("summarize_text")
+        return "Plants turn light into chemical energy."
+
+
+class StubModels:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content_stream(self, model, contents, config):
+        self.prompts.append(contents)
+        yield SimpleNamespace(text=f"Lesson {len(self.prompts)}")
+
+
+@pytest.fixture()
+def agent(monkeypatch):
+    monkeypatch.setattr(embedding, "embed_text", _bag_of_words)
+    monkeypatch.setattr(embedding, "embed_texts", lambda texts: np.stack([_bag_of_words(t) for t in texts]))
+
+    # Skip __init__, which connects to Gemini and loads the NLP/IR systems
+    agent = ContentGeneratorAgent.__new__(ContentGeneratorAgent)
+    agent.client = SimpleNamespace(models=StubModels())
+    agent.nlp_processor = StubNLP()
+    agent.llm_cache = LLMCache()
+    agent._system_configs = {}
+    agent._nlp_cache = OrderedDict()
+    agent._nlp_cache_lock = threading.Lock()
+    agent._post_cache = OrderedDict()
+    agent._post_cache_lock = threading.Lock()
+    return agent
+
+
+def _lesson(agent, topic):
+    return agent._generate_student_friendly_content(topic, "Beginner", "Physics", "Lesson", "", None)
+
+
+def test_related_lesson_topics_do_not_share_cache_entries(agent):
+    first = _lesson(agent, "Newton's first law")
+    third = _lesson(agent, "Newton's third law")
+
+    assert first != third
+    assert len(agent.client.models.prompts) == 2
+
+
+def test_repeated_lesson_topic_uses_cache(agent):
+    assert _lesson(agent, "Photosynthesis") == _lesson(agent, "Photosynthesis")
+    assert len(agent.client.models.prompts) == 1
+
+
+def test_finalized_lesson_carries_nlp_sections_and_study_materials(agent):
+    content = "Photosynthesis happens in the chloroplasts of plant cells."
+    result = agent._finalize_content("Photosynthesis", "Beginner", content, {})
+
+    lesson = result["content"]
+    assert lesson.startswith("# Photosynthesis")
+    assert content in lesson
+    assert "## 📋 Executive Summary\nPlants turn light into chemical energy." in lesson
+    assert "## 🔑 Key Terms Identified\nlight energy, carbon dioxide" in lesson
+    assert "## 🎯 Important Concepts  \nChlorophyll, Glucose" in lesson
+
+    assert result["key_concepts"] == ["Chlorophyll", "Glucose"]
+    assert result["study_materials"]["flashcards"][0] == {
+        'term': 'Chlorophyll', 'definition': 'Key concept in Photosynthesis', 'category': 'CONCEPT'
+    }
+    assert len(result["learning_objectives"]) == 4
+
+    # Phases 3 and 4 share one analysis of the generated text
+    assert sorted(agent.nlp_processor.calls) == ["extract_entities", "extract_key_phrases", "summarize_text"]
+
+
+def test_cached_post_processing_is_not_shared_between_results(agent):
+    content = "Photosynthesis happens in the chloroplasts of plant cells."
+    first = agent._finalize_content("Photosynthesis", "Beginner", content, {})
+    first["study_materials"]["flashcards"].clear()
+    first["key_concepts"].append("Edited")
+
+    second = agent._finalize_content("Photosynthesis", "Beginner", content, {})
+
+    assert len(second["study_materials"]["flashcards"]) == 2
+    assert second["key_concepts"] == ["Chlorophyll", "Glucose"]
+
+
+def test_cached_nlp_analysis_is_not_shared_between_callers(agent):
+    content = "Photosynthesis happens in the chloroplasts of plant cells."
+    agent._nlp_analyze(content)['entities'].clear()
+
+    assert [entity['text'] for entity in agent._nlp_analyze(content)['entities']] == ["Chlorophyll", "Glucose"]
+    assert agent.nlp_processor.calls.count("extract_entities") == 1
+
+
+LESSON = "\n\n".join([
+    "Photosynthesis uses Chlorophyll and Sunlight.",
+    "Chlorophyll sits in the Chloroplast next to Glucose.",
+    "Sunlight powers the Calvin cycle and makes Glucose and Oxygen.",
+    "Glucose stores energy while Oxygen is released by Plants.",
+])
+
+
+class CapitalizedNLP(StubNLP):
+    # One entity per capitalized word, repeats included, like NER over real text
+    def extract_entities(self, text):
+        self.calls.append("extract_entities")
+        return [{'text': word, 'label': 'CONCEPT'} for word in re.findall(r"\b[A-Z][a-z]+\b", text)]
+
+
+class LessonStream:
+    def generate_content_stream(self, model, contents, config):
+        for start in range(0, len(LESSON), 15):
+            yield SimpleNamespace(text=LESSON[start:start + 15])
+
+
+def test_streamed_and_full_text_analysis_agree(agent):
+    agent.nlp_processor = CapitalizedNLP()
+    agent.client = SimpleNamespace(models=LessonStream())
+    agent.STREAM_NLP_CHUNK_CHARS = 40
+
+    content = _lesson(agent, "Photosynthesis")
+    assert content == LESSON
+    assert agent.nlp_processor.calls.count("extract_entities") > 1  # NER ran on streamed windows
+    streamed = agent._finalize_content("Photosynthesis", "Beginner", content, {})
+
+    agent._nlp_cache.clear()
+    agent._post_cache.clear()
+    full_text = agent._finalize_content("Photosynthesis", "Beginner", content, {})
+
+    assert streamed["key_concepts"] == full_text["key_concepts"]
+    assert streamed["key_concepts"] == [
+        "Photosynthesis", "Chlorophyll", "Sunlight", "Chloroplast", "Glucose", "Calvin", "Oxygen", "Plants"
+    ]
+    assert streamed["study_materials"] == full_text["study_materials"]
@@ -0,0 +1,176 @@
+import json
+import re
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors
+
+import agents.feedback_evaluator as feedback_evaluator
+from agents.feedback_evaluator import FeedbackEvaluatorAgent
+from utils.llm_cache import LLMCache
+
+
+class StubModels:
+    """Gemini stand-in: `respond(contents, config)` returns the response text or raises."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+
+    def generate_content(self, model, contents, config):
+        self.calls.append((contents, config))
+        return SimpleNamespace(text=self.respond(contents, config))
+
+
+def _is_batch(config):
+    return config is feedback_evaluator._BATCH_EVALUATIONS_CONFIG
+
+
+def _single(score, feedback):
+    return json.dumps({'score': score, 'feedback': feedback})
+
+
+@pytest.fixture()
+def make_agent(monkeypatch):
+    monkeypatch.setattr(feedback_evaluator, "NLPProcessor", lambda: None)
+    monkeypatch.setattr(feedback_evaluator.time, "sleep", lambda seconds: None)
+    agents = []
+
+    def make(respond):
+        monkeypatch.setattr(feedback_evaluator, "get_genai_client", lambda: SimpleNamespace(models=StubModels(respond)))
+        agent = FeedbackEvaluatorAgent()
+        agent.llm_cache = LLMCache(similarity_threshold=None)
+        agents.append(agent)
+        return agent
+
+    yield make
+    for agent in agents:
+        agent.close()
+
+
+def _essay(text):
+    return {'type': 'Essay', 'question': text, 'sample_answer': 'reference answer'}
+
+
+ITEMS = [(_essay("Q1: explain osmosis"), "answer one"), (_essay("Q2: explain diffusion"), "answer two")]
+
+
+def test_batched_evaluations_are_scattered_back_by_index(make_agent):
+    def respond(contents, config):
+        assert _is_batch(config)
+        # Returned out of order; each result must land on its own answer
+        return json.dumps([
+            {'index': 2, 'score': 40, 'feedback': "second"},
+            {'index': 1, 'score': 140, 'feedback': "first"},
+        ])
+
+    agent = make_agent(respond)
+    evaluations = agent._llm_evaluate_text_answers(ITEMS)
+
+    assert evaluations == [{'score': 100, 'feedback': "first"}, {'score': 40, 'feedback': "second"}]
+    assert len(agent.client.models.calls) == 1
+    # Each result is cached under its single-answer prompt
+    assert agent._llm_evaluate_text_answer(*ITEMS[1]) == {'score': 40, 'feedback': "second"}
+    assert len(agent.client.models.calls) == 1
+
+
+@pytest.mark.parametrize("batch_response", [
+    "not json",
+    json.dumps([{'index': 1, 'score': 90, 'feedback': "x"}, {'index': 1, 'score': 80, 'feedback': "y"}]),
+    json.dumps([{'index': 1, 'score': 90, 'feedback': "x"}, {'index': 3, 'score': 80, 'feedback': "y"}]),
+    json.dumps([{'index': 1, 'score': 90, 'feedback': "x"}]),
+])
+def test_unusable_batch_falls_back_to_single_evaluations(make_agent, batch_response):
+    def respond(contents, config):
+        if _is_batch(config):
+            return batch_response
+        number = re.search(r"Question: Q(\d)", contents).group(1)
+        return _single(int(number) * 10, f"single {number}")
+
+    agent = make_agent(respond)
+    evaluations = agent._llm_evaluate_text_answers(ITEMS)
+
+    assert evaluations == [{'score': 10, 'feedback': "single 1"}, {'score': 20, 'feedback': "single 2"}]
+    assert [_is_batch(config) for _, config in agent.client.models.calls] == [True, False, False]
+
+
+def test_rate_limited_request_is_retried(make_agent):
+    attempts = []
+
+    def respond(contents, config):
+        attempts.append(contents)
+        if len(attempts) <= FeedbackEvaluatorAgent.RATE_LIMIT_RETRIES:
+            raise errors.ClientError(429, {'error': {'code': 429, 'message': "rate limited"}})
+        return _single(75, "ok")
+
+    agent = make_agent(respond)
+
+    assert agent._llm_evaluate_text_answer(*ITEMS[0]) == {'score': 75, 'feedback': "ok"}
+    assert len(attempts) == FeedbackEvaluatorAgent.RATE_LIMIT_RETRIES + 1
+
+
+def test_rate_limit_retries_are_bounded(make_agent):
+    def respond(contents, config):
+        raise errors.ClientError(429, {'error': {'code': 429, 'message': "rate limited"}})
+
+    agent = make_agent(respond)
+
+    with pytest.raises(errors.ClientError):
+        agent._generate_with_backoff(model="gemini-2.5-flash", contents="x", config=None)
+    assert len(agent.client.models.calls) == FeedbackEvaluatorAgent.RATE_LIMIT_RETRIES + 1
+
+
+def test_other_client_errors_are_not_retried(make_agent):
+    def respond(contents, config):
+        raise errors.ClientError(400, {'error': {'code': 400, 'message': "bad request"}})
+
+    agent = make_agent(respond)
+
+    with pytest.raises(errors.ClientError):
+        agent._generate_with_backoff(model="gemini-2.5-flash", contents="x", config=None)
+    assert len(agent.client.models.calls) == 1
+
+
+# Two missed multiple-choice questions in different weak areas, and a written
+# answer whose weak area is already among them, so suggestions start early
+QUESTIONS = [
+    {'type': 'Multiple Choice', 'question': "Define osmosis", 'correct_answer': "A"},
+    {'type': 'Multiple Choice', 'question': "Give an example of diffusion", 'correct_answer': "B"},
+    _essay("Define diffusion"),
+]
+ANSWERS = {0: "B", 1: "A", 2: "Particles spread out"}
+
+
+def test_study_suggestions_are_requested_alongside_text_evaluation(make_agent):
+    def respond(contents, config):
+        if config is feedback_evaluator._STUDY_ADVISOR_CONFIG:
+            assert "Definitions and terminology, Practical applications" in contents
+            return "Targeted suggestions"
+        return _single(50, "partial")
+
+    agent = make_agent(respond)
+    submitted = []
+    submit = agent._background.submit
+    agent._background.submit = lambda fn, *args: submitted.append(fn) or submit(fn, *args)
+
+    result = agent.evaluate_answers(QUESTIONS, ANSWERS)
+
+    assert submitted == [agent._study_suggestions_for]
+    assert result['study_suggestions'] == "Targeted suggestions"
+    assert result['individual_evaluations'][2]['score'] == 50
+
+
+def test_study_suggestions_request_is_cancelled_on_error(make_agent):
+    agent = make_agent(lambda contents, config: _single(50, "partial"))
+    pending = Future()
+    agent._background = SimpleNamespace(submit=lambda fn, *args: pending, shutdown=lambda **kwargs: None)
+
+    def fail(items):
+        raise RuntimeError("evaluation failed")
+
+    agent._llm_evaluate_text_answers = fail
+
+    with pytest.raises(Exception, match="evaluation failed"):
+        agent.evaluate_answers(QUESTIONS, ANSWERS)
+    assert pending.cancelled()
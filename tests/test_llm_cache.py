@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+import utils.embedding as embedding
+import utils.llm_cache as llm_cache
+from utils.llm_cache import LLMCache
+
+MODEL = "gemini-2.5-flash"
+SYSTEM = "You are a tutor."
+
+
+def _unit(*components):
+    vec = np.array(components, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+# Prompts with fixed embeddings: cos(query, near) = 0.96, cos(query, far) = 0.94
+VECTORS = {
+    "query": _unit(1.0, 0.0),
+    "near": _unit(0.96, 0.28),
+    "far": _unit(0.94, 0.3412),
+    "other": _unit(0.0, 1.0),
+    "opposite": _unit(-1.0, 0.0),
+}
+
+
+@pytest.fixture()
+def embed_calls(monkeypatch):
+    calls = []
+
+    def embed_texts(texts):
+        calls.append(list(texts))
+        return np.stack([VECTORS[text] for text in texts])
+
+    monkeypatch.setattr(embedding, "embed_texts", embed_texts)
+    monkeypatch.setattr(embedding, "embed_text", lambda text: embed_texts([text])[0])
+    return calls
+
+
+def _store(cache, prompt, text):
+    cache.set(MODEL, SYSTEM, prompt, text, query_vec=VECTORS.get(prompt))
+
+
+def test_exact_hit():
+    cache = LLMCache(similarity_threshold=None)
+    cache.set(MODEL, SYSTEM, "prompt", "answer")
+
+    assert cache.get(MODEL, SYSTEM, "prompt") == "answer"
+    assert cache.get(MODEL, "Another system prompt", "prompt") is None
+
+
+def test_semantic_hit_above_threshold(embed_calls):
+    cache = LLMCache(similarity_threshold=0.95)
+    _store(cache, "near", "near answer")
+
+    cached, query_vec = cache.lookup(MODEL, SYSTEM, "query")
+    assert cached == "near answer"
+    assert query_vec is not None
+
+
+def test_semantic_miss_below_threshold(embed_calls):
+    cache = LLMCache(similarity_threshold=0.95)
+    _store(cache, "far", "far answer")
+
+    cached, _ = cache.lookup(MODEL, SYSTEM, "query")
+    assert cached is None
+
+
+def test_semantic_match_is_limited_to_the_same_system_prompt(embed_calls):
+    cache = LLMCache(similarity_threshold=0.95)
+    cache.set(MODEL, "Another system prompt", "near", "near answer", query_vec=VECTORS["near"])
+
+    cached, _ = cache.lookup(MODEL, SYSTEM, "query")
+    assert cached is None
+
+
+def test_semantic_false_only_hits_exact(embed_calls):
+    cache = LLMCache(similarity_threshold=0.95)
+    _store(cache, "near", "near answer")
+
+    assert cache.lookup(MODEL, SYSTEM, "query", semantic=False) == (None, None)
+    assert embed_calls == []
+
+
+def test_entries_expire_after_ttl(monkeypatch, embed_calls):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMCache(ttl_seconds=60, similarity_threshold=0.95)
+    _store(cache, "near", "near answer")
+
+    now[0] += 59
+    assert cache.get(MODEL, SYSTEM, "near") == "near answer"
+
+    now[0] += 2
+    cached, _ = cache.lookup(MODEL, SYSTEM, "query")
+    assert cached is None
+    assert cache.get(MODEL, SYSTEM, "near") is None
+    assert cache.size() == 0
+    assert not cache._vector_counts
+    assert not cache._buckets
+
+
+def test_lru_eviction_keeps_lsh_index_consistent():
+    cache = LLMCache(maxsize=2, similarity_threshold=0.95)
+    _store(cache, "near", "near answer")
+    _store(cache, "far", "far answer")
+    cache.get(MODEL, SYSTEM, "near")  # "far" is now least recently used
+    _store(cache, "other", "other answer")
+
+    assert cache.get(MODEL, SYSTEM, "far") is None
+    assert cache.get(MODEL, SYSTEM, "near") == "near answer"
+    assert cache.get(MODEL, SYSTEM, "other") == "other answer"
+
+    namespace = LLMCache._namespace(MODEL, SYSTEM)
+    assert cache._vector_counts == {namespace: 2}
+    indexed = set().union(*cache._buckets.values())
+    assert indexed == set(cache._entries)
+    for key in cache._entries:
+        assert sum(key in bucket for bucket in cache._buckets.values()) == LLMCache.LSH_TABLES
+
+
+def test_lookup_many_keeps_prompt_order(embed_calls):
+    cache = LLMCache(similarity_threshold=0.95)
+    _store(cache, "near", "near answer")
+    cache.set(MODEL, SYSTEM, "exact", "exact answer")
+
+    results = cache.lookup_many(MODEL, SYSTEM, ["other", "exact", "query", "opposite"])
+
+    assert [cached for cached, _ in results] == [None, "exact answer", "near answer", None]
+    assert results[1][1] is None
+    # Only the prompts without an exact match are embedded, in one batch
+    assert embed_calls == [["other", "query", "opposite"]]
+
+
+def test_get_or_generate_caches_only_non_empty_responses():
+    cache = LLMCache(similarity_threshold=None)
+    responses = iter(["", "answer"])
+
+    assert cache.get_or_generate(MODEL, SYSTEM, "prompt", lambda: next(responses)) == ""
+    assert cache.get_or_generate(MODEL, SYSTEM, "prompt", lambda: next(responses)) == "answer"
+    assert cache.get_or_generate(MODEL, SYSTEM, "prompt", lambda: pytest.fail("not cached")) == "answer"
@@ -0,0 +1,66 @@
+"""
+Shared Google Gemini client.
+
+Agents all call the same API with the same key, so they share one genai.Client
+backed by a pooled httpx client: keep-alive connections are reused across
+requests and agents instead of every client opening its own. HTTP/2 is used
+when the optional h2 package is installed.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Optional
+
+import httpx
+from google import genai
+from google.genai import types
+
+try:
+    import h2  # type: ignore  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# Connection pool limits shared by every Gemini request in the process
+MAX_CONNECTIONS = 32
+MAX_KEEPALIVE_CONNECTIONS = 16
+
+_client: Optional[genai.Client] = None
+_http: Optional[httpx.Client] = None
+_lock = threading.Lock()
+
+
+def get_genai_client() -> genai.Client:
+    """Return the process-wide Gemini client, creating it on first use."""
+    global _client, _http
+    with _lock:
+        if _client is None:
+            http = httpx.Client(
+                http2=_HTTP2,
+                timeout=None,  # Request timeouts are left to genai, as with its default transport
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+            try:
+                _client = genai.Client(
+                    api_key=os.getenv("GEMINI_API_KEY"),
+                    http_options=types.HttpOptions(httpx_client=http),
+                )
+            except Exception:
+                http.close()
+                raise
+            _http = http
+    return _client
+
+
+def close_genai_client() -> None:
+    """Close the shared connection pool; the next get_genai_client() starts a new one."""
+    global _client, _http
+    with _lock:
+        if _http is not None:
+            _http.close()
+        _client = None
+        _http = None
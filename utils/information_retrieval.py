@@ -1,14 +1,27 @@
 import json
-import os
 import re
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.decomposition import TruncatedSVD
 import numpy as np
-from google import genai
 from google.genai import types
+from utils.genai_client import get_genai_client
+
+
+@dataclass(slots=True)
+class Source:
+    """Title and text of a search result, for code that only reads those two fields"""
+    title: str = ''
+    content: str = ''
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Any]) -> "Source":
+        """Build a Source from a search() result dict; missing or empty fields become ''"""
+        return cls(result.get('title') or '', result.get('content') or '')
+
 
 class InformationRetrieval:
 
@@ -20,7 +33,7 @@ class InformationRetrieval:
     
     def __init__(self):
         # Using Google Gemini 2.5 Flash for free AI-powered information retrieval
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        self.client = get_genai_client()
         
         # Initialize TF-IDF vectorizer for document similarity
         self.vectorizer = TfidfVectorizer(
@@ -38,6 +51,8 @@ class InformationRetrieval:
         self.knowledge_base = {}
         self.document_vectors = None
         self.document_ids = []
+        # Lowercased title and term set per document for keyword search
+        self._doc_terms = {}
         
         # Initialize with educational knowledge base
         self._initialize_knowledge_base()
@@ -180,12 +195,15 @@ class InformationRetrieval:
         
         documents = []
         self.document_ids = []
+        self._doc_terms = {}
         
         for doc_id, doc in self.knowledge_base.items():
             # Combine title and content for better matching
             text = f"{doc['title']} {doc['content']}"
             documents.append(text)
             self.document_ids.append(doc_id)
+            # Lowercase and tokenize once here instead of on every keyword search
+            self._doc_terms[doc_id] = (doc['title'].lower(), frozenset(text.lower().split()))
         
         # Create TF-IDF vectors
         
@@ -298,8 +316,7 @@ class InformationRetrieval:
         results = []
         
         for doc_id, doc in self.knowledge_base.items():
-            content_lower = f"{doc['title']} {doc['content']}".lower()
-            content_terms = set(content_lower.split())
+            title_lower, content_terms = self._doc_terms[doc_id]
             
             # Calculate keyword overlap
             overlap = len(query_terms.intersection(content_terms))
@@ -309,7 +326,6 @@ class InformationRetrieval:
                 relevance_score = overlap / total_terms
                 
                 # Boost score for title matches
-                title_lower = doc['title'].lower()
                 if any(term in title_lower for term in query_terms):
                     relevance_score *= 1.5
                 
@@ -0,0 +1,263 @@
+"""
+In-process cache for LLM responses.
+
+Lookups first try an exact match on a SHA-256 digest of the model, system prompt
+and user prompt. On a miss, the user prompt is embedded and compared against
+cached prompts that share the same model and system prompt; a cosine similarity
+at or above the threshold counts as a hit (semantic cache). Embeddings come from
+utils.embedding; if sentence-transformers is unavailable the cache silently
+degrades to exact matching only.
+
+Entries expire after a TTL and the cache is bounded with LRU eviction.
+Prompt embeddings are stored as int8 with a per-vector scale, a quarter of
+the float32 size; the rounding error is far below the similarity threshold.
+
+Semantic lookups scan every cached prompt of the namespace while it is small.
+Past LSH_MIN_ENTRIES prompts, a random-projection LSH index (LSH_TABLES tables
+of LSH_BITS-bit signatures) narrows the scan to prompts that share a bucket
+with the query in at least one table.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Prompt embedding quantized to int8, and the scale that maps it back
+_Quantized = Tuple[np.ndarray, float]
+# (expires_at, namespace, response text, quantized prompt embedding or None, LSH signatures or None)
+_Entry = Tuple[float, str, str, Optional[_Quantized], Optional[Tuple[int, ...]]]
+
+
+def _quantize(vec: np.ndarray) -> _Quantized:
+    """Symmetric int8 quantization of a vector with one scale for the whole vector."""
+    scale = float(np.abs(vec).max()) / 127 or 1.0
+    return np.round(vec / scale).astype(np.int8), scale
+
+
+class LLMCache:
+    # Random-projection LSH over prompt embeddings, used once a namespace is large
+    LSH_TABLES = 8
+    LSH_BITS = 12
+    LSH_MIN_ENTRIES = 1000
+
+    def __init__(self, maxsize: int = 512, ttl_seconds: float = 24 * 3600,
+                 similarity_threshold: Optional[float] = 0.95):
+        """
+        Args:
+            maxsize: Maximum number of cached responses (LRU eviction beyond this)
+            ttl_seconds: Seconds a cached response stays valid
+            similarity_threshold: Minimum cosine similarity of user prompts for a
+                semantic hit; None disables semantic matching
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._semantic_available = similarity_threshold is not None
+        # Embedded entries per namespace, and (namespace, table, signature) -> keys
+        self._vector_counts: Counter = Counter()
+        self._buckets: Dict[Tuple[str, int, int], Set[str]] = {}
+        self._planes: Optional[np.ndarray] = None
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str) -> str:
+        """Exact-match key for a prompt."""
+        payload = json.dumps({"model": model, "sys": system_prompt, "usr": user_prompt}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _namespace(model: str, system_prompt: str) -> str:
+        # Semantic matches are only considered between prompts with the same
+        # model and system prompt, which carry the difficulty/subject settings
+        return hashlib.sha256(f"{model}\x00{system_prompt}".encode("utf-8")).hexdigest()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        if not self._semantic_available:
+            return None
+        try:
+            from utils.embedding import embed_text
+            return embed_text(text)
+        except Exception:
+            # Model not installed/loadable: fall back to exact matching only
+            self._semantic_available = False
+            return None
+
+    def _embed_many(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Embed several texts in one model call (rows in order), or None if unavailable."""
+        if not self._semantic_available or not texts:
+            return None
+        try:
+            from utils.embedding import embed_texts
+            return embed_texts(texts)
+        except Exception:
+            self._semantic_available = False
+            return None
+
+    def _signatures(self, vec: np.ndarray) -> Tuple[int, ...]:
+        """LSH bucket of the vector in each table (sign pattern of its projections)."""
+        if self._planes is None:
+            # Fixed seed: the same prompt always lands in the same buckets
+            rng = np.random.default_rng(0)
+            self._planes = rng.standard_normal((self.LSH_TABLES, self.LSH_BITS, vec.shape[0])).astype(np.float32)
+        bits = (self._planes @ vec) > 0
+        return tuple((bits @ (1 << np.arange(self.LSH_BITS))).tolist())
+
+    def _remove(self, key: str) -> None:
+        """Drop an entry and its LSH postings; the lock must be held."""
+        entry = self._entries.pop(key)
+        namespace, sigs = entry[1], entry[4]
+        if sigs is None:
+            return
+        self._vector_counts[namespace] -= 1
+        if not self._vector_counts[namespace]:
+            del self._vector_counts[namespace]
+        for table, sig in enumerate(sigs):
+            bucket = self._buckets[(namespace, table, sig)]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[(namespace, table, sig)]
+
+    def get(self, model: str, system_prompt: str, user_prompt: str,
+            query_vec: Optional[np.ndarray] = None) -> Optional[str]:
+        """Return a cached response for the prompt, or None on a miss."""
+        key = self.make_key(model, system_prompt, user_prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[2]
+                self._remove(key)
+
+        if query_vec is None:
+            return None
+
+        namespace = self._namespace(model, system_prompt)
+        with self._lock:
+            scan: Iterable[Tuple[str, _Entry]]
+            if self._vector_counts[namespace] > self.LSH_MIN_ENTRIES:
+                # Only prompts sharing a bucket with the query in some table are scored
+                keys: Set[str] = set()
+                for table, sig in enumerate(self._signatures(query_vec)):
+                    keys |= self._buckets.get((namespace, table, sig), set())
+                scan = ((k, self._entries[k]) for k in keys)
+            else:
+                scan = self._entries.items()
+            candidates = [
+                (k, e[2], e[3]) for k, e in scan
+                if e[1] == namespace and e[3] is not None and e[0] > now
+            ]
+        if not candidates:
+            return None
+
+        # Embeddings are L2-normalized, so the dot product is cosine similarity;
+        # each quantized row is rescaled after the product rather than dequantized
+        matrix = np.stack([q[0] for _, _, q in candidates]).astype(np.float32)
+        sims = (matrix @ query_vec) * np.array([q[1] for _, _, q in candidates], dtype=np.float32)
+        best = int(np.argmax(sims))
+        if sims[best] < self.similarity_threshold:
+            return None
+
+        best_key, best_text, _ = candidates[best]
+        with self._lock:
+            if best_key in self._entries:
+                self._entries.move_to_end(best_key)
+        return best_text
+
+    def set(self, model: str, system_prompt: str, user_prompt: str, text: str,
+            query_vec: Optional[np.ndarray] = None) -> None:
+        """Store a response for the prompt."""
+        key = self.make_key(model, system_prompt, user_prompt)
+        namespace = self._namespace(model, system_prompt)
+        with self._lock:
+            sigs = self._signatures(query_vec) if query_vec is not None else None
+            if key in self._entries:
+                self._remove(key)
+            quantized = _quantize(query_vec) if query_vec is not None else None
+            self._entries[key] = (time.time() + self.ttl_seconds, namespace, text, quantized, sigs)
+            if sigs is not None:
+                self._vector_counts[namespace] += 1
+                for table, sig in enumerate(sigs):
+                    self._buckets.setdefault((namespace, table, sig), set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def lookup(self, model: str, system_prompt: str, user_prompt: str, semantic: bool = True,
+               semantic_text: Optional[str] = None) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Exact, then semantic lookup of a prompt.
+
+        Returns (cached response or None, prompt embedding or None); on a miss
+        the embedding can be passed to set() so the response is stored without
+        embedding the prompt again. See get_or_generate for the arguments.
+        """
+        cached = self.get(model, system_prompt, user_prompt)
+        if cached is not None:
+            return cached, None
+
+        query_vec = self._embed(user_prompt if semantic_text is None else semantic_text) if semantic else None
+        if query_vec is not None:
+            cached = self.get(model, system_prompt, user_prompt, query_vec=query_vec)
+        return cached, query_vec
+
+    def lookup_many(self, model: str, system_prompt: str, user_prompts: Sequence[str], semantic: bool = True,
+                    semantic_texts: Optional[Sequence[str]] = None) -> List[Tuple[Optional[str], Optional[np.ndarray]]]:
+        """
+        lookup() for several prompts sharing a model and system prompt.
+
+        Prompts without an exact match are embedded together in a single
+        batched model call rather than one call each. Returns one
+        (cached response or None, prompt embedding or None) pair per prompt.
+        """
+        results: List[Tuple[Optional[str], Optional[np.ndarray]]] = [
+            (self.get(model, system_prompt, user_prompt), None) for user_prompt in user_prompts
+        ]
+        misses = [n for n, (cached, _) in enumerate(results) if cached is None]
+        if not semantic or not misses:
+            return results
+
+        texts = user_prompts if semantic_texts is None else semantic_texts
+        vecs = self._embed_many([texts[n] for n in misses])
+        if vecs is not None:
+            for n, query_vec in zip(misses, vecs):
+                results[n] = (self.get(model, system_prompt, user_prompts[n], query_vec=query_vec), query_vec)
+        return results
+
+    def get_or_generate(self, model: str, system_prompt: str, user_prompt: str,
+                        generate: Callable[[], Optional[str]], semantic: bool = True,
+                        semantic_text: Optional[str] = None) -> Optional[str]:
+        """
+        Return a cached response, or call `generate` and cache its result.
+
+        Pass semantic=False for prompts where a small wording change matters
+        (e.g. the same text with a different target level); those only hit on
+        an exact match. semantic_text, when given, is embedded for semantic
+        matching instead of the whole user prompt, so boilerplate shared by
+        every prompt does not inflate similarity. Empty responses are returned
+        but not cached; an exception from `generate` propagates uncached.
+        """
+        cached, query_vec = self.lookup(model, system_prompt, user_prompt, semantic, semantic_text)
+        if cached is not None:
+            return cached
+
+        text = generate()
+        if text:
+            self.set(model, system_prompt, user_prompt, text, query_vec=query_vec)
+        return text
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._vector_counts.clear()
+            self._buckets.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
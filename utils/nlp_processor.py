@@ -8,12 +8,18 @@ text processing and scikit-learn for embeddings and similarity.
 """
 
 import re
+import functools
 import nltk
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from nltk.chunk import ne_chunk
 from nltk.tag import pos_tag
+try:
+    # NLTK >= 3.9: ne_chunk() builds a new chunker (reloading its model) on every call
+    from nltk.chunk import ne_chunker
+except ImportError:
+    ne_chunker = None
 from collections import Counter
 import os
 from difflib import SequenceMatcher
@@ -52,6 +58,20 @@ try:
 except LookupError:
     nltk.download('words')
 
+@functools.lru_cache(maxsize=None)
+def _load_ne_chunker():
+    """Load the named entity chunker once per process"""
+    return ne_chunker()
+
+
+def _ne_chunk(pos_tags):
+    """Named entity chunking with a shared, already loaded chunker"""
+    if ne_chunker is None:
+        # Older NLTK loads the chunker through nltk.data, which caches it already
+        return ne_chunk(pos_tags, binary=False)
+    return _load_ne_chunker().parse(pos_tags)
+
+
 class NLPProcessor:
     """
     Natural Language Processing utilities for the tutoring system.
@@ -161,7 +181,7 @@ class NLPProcessor:
             pos_tags = pos_tag(tokens)
             
             # Extract named entities
-            tree = ne_chunk(pos_tags, binary=False)
+            tree = _ne_chunk(pos_tags)
             
             entities = []
             current_entity = []